@@ -5,15 +5,18 @@ from typing import Optional, Tuple, TYPE_CHECKING
 
 import color
 import exceptions
+from slotted import Slotted
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Actor, Entity, Item
 
 
-class Action:
+class Action(Slotted):
     """A class representing an action."""
 
+    __slots__ = ("entity",)
+
     def __init__(self, entity: Actor) -> None:
         super().__init__()
         self.entity = entity
@@ -42,21 +45,20 @@ class PickupAction(Action):
 
     def perform(self) -> None:
         """Try to pickup item at entity location."""
-        actor_location_x = self.entity.x
-        actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
-                if len(inventory.items) >= inventory.capacity:
-                    raise exceptions.ActionCannotBePerformed("Your inventory is full.")
+        for item in self.engine.game_map.get_items_at_location(
+            self.entity.x, self.entity.y
+        ):
+            if len(inventory.items) >= inventory.capacity:
+                raise exceptions.ActionCannotBePerformed("Your inventory is full.")
 
-                self.engine.game_map.entities.remove(item)
-                item.parent = self.entity.inventory
-                inventory.items.append(item)
+            self.engine.game_map.remove_entity(item)
+            item.parent = self.entity.inventory
+            inventory.items.append(item)
 
-                self.engine.message_log.add_message(f"You picked up the {item.name}!")
-                return
+            self.engine.message_log.add_message(f"You picked up the {item.name}!")
+            return
 
         raise exceptions.ActionCannotBePerformed("There is nothing here to pick up.")
 
@@ -125,15 +127,25 @@ class WaitAction(Action):
 
 
 class TakeStairsAction(Action):
-    """A class for handling going up the stairs."""
+    """A class for handling going up or down the stairs."""
 
     def perform(self) -> None:
         """Take the stairs, if any exist at the entity's location."""
-        if (self.entity.x, self.entity.y) == self.engine.game_map.downstairs_location:
-            self.engine.game_world.generate_floor()
+        location = (self.entity.x, self.entity.y)
+        game_world = self.engine.game_world
+        if location == self.engine.game_map.downstairs_location:
+            game_world.generate_floor()
             self.engine.message_log.add_message(
                 "You descend the staircase.", color.descend
             )
+        elif (
+            location == self.engine.game_map.start_location
+            and game_world.current_floor > 1
+        ):
+            game_world.ascend_floor()
+            self.engine.message_log.add_message(
+                "You ascend the staircase.", color.ascend
+            )
         else:
             raise exceptions.ActionCannotBePerformed("There are no stairs here.")
 
@@ -177,6 +189,9 @@ class MeleeAction(ActionWithDirection):
             raise exceptions.ActionCannotBePerformed("Nothing to attack.")
 
         damage = self.entity.fighter.power - target.fighter.defense
+        self.engine.game_map.make_noise(
+            target.x, target.y, self.engine.config.ai["fight_noise_radius"]
+        )
 
         attack_desc = f"{self.entity.name.capitalize()} attacks {target.name}"
         if self.entity is self.engine.player:
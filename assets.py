@@ -0,0 +1,81 @@
+"""Images and tilesets, loaded on first use.
+
+Decoded images are kept as .npy files in the `asset_cache` path, named after
+the source file's size and modification time, so they are decoded again
+whenever the source changes. The cache only saves work: if it can not be read
+or written, images are decoded from their source as usual.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import zlib
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np  # type: ignore
+import tcod
+
+from config import get_config
+
+# Change to stop reading cache files written by an older version of this module.
+CACHE_VERSION = 1
+
+
+def cache_path(source: Path, kind: str, *params: object) -> Path:
+    """Return the cache file for a source file decoded as `kind` with `params`."""
+    stat = source.stat()
+    key = f"{CACHE_VERSION}:{kind}:{stat.st_size}:{stat.st_mtime_ns}:{params}"
+    cache_dir = get_config().paths["asset_cache"]
+    return cache_dir / f"{source.stem}-{kind}-{zlib.crc32(key.encode()):08x}.npy"
+
+
+def cached_array(
+    source: Path, kind: str, params: tuple, decode: Callable[[], np.ndarray]
+) -> np.ndarray:
+    """Return the array `decode` makes from a source file, from the cache if it can."""
+    path = cache_path(source, kind, *params)
+    try:
+        return np.load(path)
+    except (OSError, ValueError, EOFError):
+        pass  # Not cached yet, or written by something else.
+
+    array = decode()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        with open(partial, "wb") as f:
+            np.save(f, array)
+        os.replace(partial, path)
+    except OSError:
+        pass  # The game runs the same without a cache.
+    return array
+
+
+def resolve(filename: str) -> Path:
+    """Return the path of an asset, relative to the game's directory."""
+    return get_config().root_dir / filename
+
+
+@functools.lru_cache(maxsize=None)
+def load_image(filename: str) -> np.ndarray:
+    """Load an image on first use, without its alpha channel."""
+    source = resolve(filename)
+    return cached_array(
+        source, "rgb", (), lambda: tcod.image.load(source)[:, :, :3].copy()
+    )
+
+
+def load_tileset(
+    filename: str,
+    columns: int,
+    rows: int,
+    charmap: Optional[Iterable[int]] = None,
+) -> tcod.tileset.Tileset:
+    """Load a tilesheet with tiles in `charmap` order, CHARMAP_TCOD by default.
+
+    Tilesheets are not cached: tcod loads one faster than its tiles can be
+    copied back in from a cache file.
+    """
+    codepoints = tcod.tileset.CHARMAP_TCOD if charmap is None else charmap
+    return tcod.tileset.load_tilesheet(resolve(filename), columns, rows, codepoints)
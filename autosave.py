@@ -0,0 +1,117 @@
+"""Periodic saving on a background thread."""
+from __future__ import annotations
+
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import floor_store
+import save_format
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+
+class Autosaver:
+    """Save the game every few turns and on every floor change.
+
+    A snapshot of the game is taken on the calling thread, which is cheap. It is
+    then serialized, compressed and renamed into place on a worker thread, so
+    saving never stalls the render loop.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        every_n_turns: int,
+        on_floor_change: bool = True,
+        compression_level: int = 6,
+    ):
+        self.filename = filename
+        self.every_n_turns = every_n_turns
+        self.on_floor_change = on_floor_change
+        self.compression_level = compression_level
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        self.pending: Optional[Future[int]] = None
+        self.last_engine: Optional[Engine] = None
+        self.last_turn = 0
+        self.last_floor = 0
+
+        # Statistics about the most recent save.
+        self.saves = 0
+        self.last_snapshot_seconds = 0.0
+        self.last_write_seconds = 0.0
+        self.last_bytes_written = 0
+
+    def is_due(self, engine: Engine) -> bool:
+        """Return True if the engine has changed enough to be saved again."""
+        if engine is not self.last_engine:
+            # A new or loaded game: start counting from here.
+            self.last_engine = engine
+            self.last_turn = engine.turn_count
+            self.last_floor = engine.game_world.current_floor
+            return False
+        if self.on_floor_change and (
+            engine.game_world.current_floor != self.last_floor
+        ):
+            return True
+        return 0 < self.every_n_turns <= engine.turn_count - self.last_turn
+
+    def update(self, engine: Engine) -> bool:
+        """Start a background save if one is due.
+
+        Returns True if a save was started.
+        """
+        if not engine.player.is_alive:
+            # Let any save in flight finish, so a finished game can be deleted.
+            self.wait()
+            return False
+        if not self.is_due(engine):
+            return False
+        if self.pending is not None:
+            if not self.pending.done():
+                return False  # Still writing the previous save; try again later.
+            self.wait()
+
+        start = time.perf_counter()
+        manifest = save_format.snapshot(engine)
+        loaded = engine.game_world.floors.take_loaded()
+        self.last_snapshot_seconds = time.perf_counter() - start
+
+        self.last_turn = engine.turn_count
+        self.last_floor = engine.game_world.current_floor
+        self.pending = self.executor.submit(self.write, manifest, loaded)
+        return True
+
+    def write(self, manifest: Dict[str, Any], loaded: List[str]) -> int:
+        """Write a snapshot to disk. Runs on the worker thread.
+
+        `loaded` are floor cache files the snapshot no longer refers to, deleted
+        once it is written.
+        """
+        start = time.perf_counter()
+        bytes_written = save_format.write_snapshot(
+            manifest, self.filename, self.compression_level
+        )
+        floor_store.remove_files(loaded)
+        self.last_write_seconds = time.perf_counter() - start
+        self.last_bytes_written = bytes_written
+        self.saves += 1
+        return bytes_written
+
+    def wait(self) -> None:
+        """Block until the save in flight, if any, is on disk."""
+        if self.pending is not None:
+            try:
+                self.pending.result()
+            except Exception:
+                # A failed autosave must not take the running game down with it.
+                traceback.print_exc()
+            self.pending = None
+
+    def close(self) -> None:
+        """Finish any save in flight and stop the worker thread."""
+        self.wait()
+        self.executor.shutdown()
@@ -0,0 +1,79 @@
+"""Measure the time and memory each map generator takes to build a floor.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.generators --width 200 --height 200 --floors 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import map_generators
+from config import get_config
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=200, help="map width")
+    parser.add_argument("--height", type=int, default=200, help="map height")
+    parser.add_argument("--floors", type=int, default=5, help="floors per generator")
+    parser.add_argument(
+        "--generators",
+        nargs="+",
+        default=list(map_generators.GENERATORS),
+        choices=list(map_generators.GENERATORS),
+    )
+    args = parser.parse_args(argv)
+
+    config = get_config()
+    rooms = config.procgen["rooms"]
+    results: Dict[str, Any] = {}
+    for name in args.generators:
+        generator = map_generators.make_generator(
+            name,
+            rooms["max_rooms"],
+            rooms["min_size"],
+            rooms["max_size"],
+            config.procgen["generators"].get(name),
+        )
+        seconds: List[float] = []
+        peaks: List[int] = []
+        floor_tiles: List[int] = []
+        for floor in range(1, args.floors + 1):
+            rng = random.Random(f"benchmark:{floor}")
+            start = time.perf_counter()
+            generator.generate(args.width, args.height, None, floor, rng)  # type: ignore
+            seconds.append(time.perf_counter() - start)
+
+            # Measured apart from the timing, which tracemalloc slows down.
+            rng = random.Random(f"benchmark:{floor}")
+            tracemalloc.start()
+            game_map = generator.generate(
+                args.width, args.height, None, floor, rng  # type: ignore
+            )
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            floor_tiles.append(int(game_map.tiles["walkable"].sum()))
+
+        results[name] = {
+            "map": f"{args.width}x{args.height}",
+            "mean_ms": 1000 * statistics.mean(seconds),
+            "max_ms": 1000 * max(seconds),
+            "peak_bytes": max(peaks),
+            "mean_floor_tiles": statistics.mean(floor_tiles),
+        }
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
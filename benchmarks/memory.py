@@ -0,0 +1,87 @@
+"""Measure the memory used per entity by many spawned monsters and items.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.memory --count 10000
+
+For comparison, the same objects are also rebuilt with a __dict__ per object, the
+layout entities and components had when they were spawned with copy.deepcopy.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import entity_factories
+from entity import Entity
+from slotted import Slotted
+
+TEMPLATES = ("orc", "troll", "health_potion", "fireball_scroll", "dagger")
+
+
+@functools.lru_cache(maxsize=None)
+def dict_class(cls: type) -> type:
+    """Return a plain class standing in for a slotted class, with a __dict__."""
+    return type(cls.__name__, (), {})
+
+
+def as_dict_objects(obj: Any, memo: Dict[int, Any]) -> Any:
+    """Rebuild a graph of slotted objects with a __dict__ for every object."""
+    if not isinstance(obj, Slotted):
+        if isinstance(obj, list):
+            return [as_dict_objects(item, memo) for item in obj]
+        return obj
+    if id(obj) not in memo:
+        copy = memo[id(obj)] = dict_class(type(obj))()
+        # Filled in the way copy.deepcopy, which spawning used, fills objects.
+        copy.__dict__.update(
+            {name: as_dict_objects(value, memo) for name, value in obj.attributes()}
+        )
+    return memo[id(obj)]
+
+
+def measure(build: Callable[[], List[Any]]) -> int:
+    """Return the bytes still allocated by the objects `build` returns."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="entities to spawn")
+    args = parser.parse_args(argv)
+
+    templates: List[Entity] = [getattr(entity_factories, name) for name in TEMPLATES]
+    originals = [templates[i % len(templates)].clone() for i in range(args.count)]
+
+    slotted_bytes = measure(
+        lambda: [templates[i % len(templates)].clone() for i in range(args.count)]
+    )
+    dict_bytes = measure(lambda: [as_dict_objects(entity, {}) for entity in originals])
+
+    results = {
+        "entities": args.count,
+        "slots_bytes": slotted_bytes,
+        "slots_bytes_per_entity": slotted_bytes / args.count,
+        "dict_bytes": dict_bytes,
+        "dict_bytes_per_entity": dict_bytes / args.count,
+        "saving": 1 - slotted_bytes / dict_bytes if dict_bytes else 0.0,
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+"""Measure how fast dungeon layouts are generated, on maps of any size.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.procgen --width 500 --height 500 --rooms 5000
+
+For comparison, each map is also built with the original room and corridor loop,
+which checked every candidate against every placed room and dug corridors one
+tile at a time. Both must produce the same tiles and entities from the same seed.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # type: ignore
+
+import procgen
+import tile_types
+from game_map import GameMap
+
+
+def generate_dungeon_per_tile(
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    floor_number: int,
+    rng: random.Random,
+) -> GameMap:
+    """Build a dungeon the way generate_dungeon did before it used slices."""
+    dungeon = GameMap(None, map_width, map_height)  # type: ignore
+    rooms: List[procgen.RectangularRoom] = []
+
+    for r in range(max_rooms):
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
+
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
+
+        new_room = procgen.RectangularRoom(x, y, room_width, room_height)
+        if any(new_room.intersects(other_room) for other_room in rooms):
+            continue
+
+        dungeon.tiles[new_room.inner] = tile_types.floor
+        if len(rooms) == 0:
+            dungeon.start_location = new_room.center
+        else:
+            for x, y in procgen.tunnel_between(rooms[-1].center, new_room.center, rng):
+                dungeon.tiles[x, y] = tile_types.floor
+
+        procgen.place_entities(new_room, dungeon, floor_number, rng)
+        rooms.append(new_room)
+
+    if floor_number > 1:
+        dungeon.tiles[dungeon.start_location] = tile_types.up_stairs
+    dungeon.tiles[rooms[-1].center] = tile_types.down_stairs
+    dungeon.downstairs_location = rooms[-1].center
+
+    return dungeon
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=500, help="map width")
+    parser.add_argument("--height", type=int, default=500, help="map height")
+    parser.add_argument("--rooms", type=int, default=5000, help="room attempts")
+    parser.add_argument("--room-min-size", type=int, default=6)
+    parser.add_argument("--room-max-size", type=int, default=10)
+    parser.add_argument("--floor", type=int, default=1, help="floor number")
+    parser.add_argument("--seeds", type=int, default=5, help="maps to generate")
+    args = parser.parse_args(argv)
+
+    settings = dict(
+        max_rooms=args.rooms,
+        room_min_size=args.room_min_size,
+        room_max_size=args.room_max_size,
+        map_width=args.width,
+        map_height=args.height,
+        floor_number=args.floor,
+    )
+    sliced: List[float] = []
+    per_tile: List[float] = []
+    floor_tiles: List[int] = []
+    for seed in range(args.seeds):
+        start = time.perf_counter()
+        dungeon = procgen.generate_dungeon(
+            engine=None, rng=random.Random(seed), **settings  # type: ignore
+        )
+        sliced.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        reference = generate_dungeon_per_tile(rng=random.Random(seed), **settings)
+        per_tile.append(time.perf_counter() - start)
+
+        if not np.array_equal(dungeon.tiles, reference.tiles):
+            raise AssertionError(f"Seed {seed} generated a different layout.")
+        if [(e.name, e.x, e.y) for e in dungeon.entities] != [
+            (e.name, e.x, e.y) for e in reference.entities
+        ]:
+            raise AssertionError(f"Seed {seed} placed different entities.")
+        floor_tiles.append(int(dungeon.tiles["walkable"].sum()))
+
+    results = {
+        "map": f"{args.width}x{args.height}",
+        "room_attempts": args.rooms,
+        "maps": args.seeds,
+        "mean_floor_tiles": statistics.mean(floor_tiles),
+        "generate_ms": 1000 * statistics.mean(sliced),
+        "per_tile_ms": 1000 * statistics.mean(per_tile),
+        "speedup": statistics.mean(per_tile) / statistics.mean(sliced),
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
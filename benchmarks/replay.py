@@ -0,0 +1,67 @@
+"""Replay a recorded game as fast as possible and report how quickly it ran.
+
+Games started from the main menu are recorded to the `journal` path of
+config.yml. Run from the repository root, e.g.:
+
+    python -m benchmarks.replay last_game.journal --checkpoint-every 100
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+import replay
+from config import get_config
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "journal",
+        nargs="?",
+        default=str(get_config().paths["journal"]),
+        help="journal to replay",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=0,
+        help="save the game every this many turns, 0 to never",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default="replay_checkpoints",
+        help="directory to save checkpoints in",
+    )
+    args = parser.parse_args(argv)
+
+    journal = replay.read_journal(args.journal)
+    replayer = replay.Replayer(
+        journal,
+        checkpoint_every=args.checkpoint_every,
+        checkpoint_dir=args.checkpoint_dir,
+    )
+    engine = replayer.run()
+
+    results = {
+        "seed": journal.seed,
+        "records": len(journal.records),
+        "turns": engine.turn_count,
+        "failed_actions": replayer.failed_actions,
+        "seconds": replayer.seconds,
+        "turns_per_second": engine.turn_count / replayer.seconds
+        if replayer.seconds
+        else 0.0,
+        "floor": engine.game_world.current_floor,
+        "player_alive": engine.player.is_alive,
+        "checkpoints": replayer.checkpoints,
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+"""Measure how fast entities are spawned from the entity_factories templates.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.spawn --count 10000
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import entity_factories
+from entity import Entity
+
+TEMPLATES = (
+    "player",
+    "orc",
+    "troll",
+    "health_potion",
+    "lightning_scroll",
+    "confusion_scroll",
+    "fireball_scroll",
+    "dagger",
+    "leather_armor",
+)
+
+
+def time_copies(template: Entity, count: int, deep: bool) -> float:
+    """Return the seconds taken to copy a template `count` times."""
+    start = time.perf_counter()
+    if deep:
+        for _ in range(count):
+            copy.deepcopy(template)
+    else:
+        for _ in range(count):
+            template.clone()
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000, help="copies per template")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, Any] = {}
+    for name in TEMPLATES:
+        template = getattr(entity_factories, name)
+        deepcopy_seconds = time_copies(template, args.count, deep=True)
+        clone_seconds = time_copies(template, args.count, deep=False)
+        results[name] = {
+            "deepcopy_per_second": args.count / deepcopy_seconds,
+            "clone_per_second": args.count / clone_seconds,
+            "speedup": deepcopy_seconds / clone_seconds,
+        }
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
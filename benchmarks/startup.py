@@ -0,0 +1,88 @@
+"""Measure how long the game takes to import and to draw its first frames.
+
+Every run is a fresh Python process, so imports are timed cold. Runs with a
+cold asset cache delete the `asset_cache` directory first. The window itself is
+not opened; frames are drawn on an offscreen console. Run from the repository
+root, e.g.:
+
+    python -m benchmarks.startup --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from config import get_config
+
+# Runs in a new process and prints its timings, in seconds, as JSON.
+CHILD = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+import tcod
+import assets
+import input_handlers
+import setup_game
+from config import get_config
+
+config = get_config()
+console = tcod.Console(*config.screen_size, order="F")
+assets.load_tileset(config.relative_paths["tileset"], 32, 8)
+setup_game.MainMenu().on_render(console)
+menu = time.perf_counter()
+
+engine = setup_game.new_game(seed=0)
+input_handlers.MainGameEventHandler(engine).on_render(console)
+game = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - start,
+    "first_frame": menu - start,
+    "first_game_frame": game - start,
+}))
+"""
+
+
+def run_child() -> Dict[str, float]:
+    """Start the game in a new process and return its timings."""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, check=True, text=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="processes per cache")
+    args = parser.parse_args(argv)
+
+    cache_dir = get_config().paths["asset_cache"]
+    results: Dict[str, Any] = {}
+    for cache in ("cold", "warm"):
+        runs: List[Dict[str, float]] = []
+        for _ in range(args.runs):
+            if cache == "cold":
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            runs.append(run_child())
+        results[f"{cache}_asset_cache"] = {
+            f"{name}_ms": {
+                "median": 1000 * statistics.median(run[name] for run in runs),
+                "max": 1000 * max(run[name] for run in runs),
+            }
+            for name in runs[0]
+        }
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
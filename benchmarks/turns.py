@@ -0,0 +1,152 @@
+"""Measure headless turns per second across many seeds.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.turns --turns 500 --seeds 10 --output turns.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+import numpy as np  # type: ignore
+
+import entity_factories
+import headless
+import setup_game
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None  # type: ignore
+
+
+def crowd_floor(engine: Any, count: int, rng: random.Random) -> None:
+    """Spawn `count` more orcs on free floor tiles of the current map."""
+    game_map = engine.game_map
+    xs, ys = np.nonzero(game_map.tiles["walkable"])
+    free = [
+        (x, y)
+        for x, y in zip(xs.tolist(), ys.tolist())
+        if not game_map.get_entities_at_location(x, y)
+    ]
+    for x, y in rng.sample(free, min(count, len(free))):
+        entity_factories.orc.spawn(game_map, x, y)
+
+
+def run_seed(
+    seed: int,
+    turns: int,
+    script: Optional[List[str]],
+    render: bool,
+    extra_monsters: int = 0,
+) -> Dict[str, Any]:
+    """Play one seeded game headlessly and return its measurements."""
+    start = time.perf_counter()
+    engine = setup_game.new_game(seed=seed)
+    new_game_seconds = time.perf_counter() - start
+    if extra_monsters:
+        crowd_floor(engine, extra_monsters, random.Random(seed))
+
+    if script:
+        policy = headless.scripted_policy(script)
+    else:
+        policy = headless.random_policy(random.Random(seed))
+    session = headless.HeadlessSession(engine, policy, render=render)
+
+    start = time.perf_counter()
+    session.run(turns)
+    seconds = time.perf_counter() - start
+
+    return {
+        "seed": seed,
+        "turns": session.turns,
+        "failed_actions": session.failed_actions,
+        "floor": engine.game_world.current_floor,
+        "player_alive": engine.player.is_alive,
+        "new_game_seconds": new_game_seconds,
+        "seconds": seconds,
+        "turns_per_second": session.turns / seconds if seconds else 0.0,
+        "phases": session.timings,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Run the benchmark and print its results as JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=500, help="turns per seed")
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument(
+        "--script", help="file of scripted commands, one per line, instead of random"
+    )
+    parser.add_argument("--no-render", action="store_true", help="skip rendering")
+    parser.add_argument(
+        "--extra-monsters",
+        type=int,
+        default=0,
+        help="orcs to add to the first floor, to load the monsters' turns",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="also report the tracemalloc peak (slows the run down)",
+    )
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = [line.strip() for line in f if line.strip()]
+
+    if args.trace_memory:
+        tracemalloc.start()
+
+    runs = [
+        run_seed(
+            seed,
+            args.turns,
+            script,
+            render=not args.no_render,
+            extra_monsters=args.extra_monsters,
+        )
+        for seed in range(args.first_seed, args.first_seed + args.seeds)
+    ]
+
+    total_turns = sum(run["turns"] for run in runs)
+    total_seconds = sum(run["seconds"] for run in runs)
+    results: Dict[str, Any] = {
+        "turns": total_turns,
+        "seconds": total_seconds,
+        "turns_per_second": total_turns / total_seconds if total_seconds else 0.0,
+        "phases": {
+            phase: sum(run["phases"][phase] for run in runs)
+            for phase in headless.PHASES
+        },
+        "new_game_seconds": sum(run["new_game_seconds"] for run in runs),
+        "runs": runs,
+    }
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux.
+        results["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if args.trace_memory:
+        results["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    return results
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
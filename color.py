@@ -21,6 +21,7 @@ invalid = (0xFF, 0xFF, 0x00)
 action_cannot_be_performed = (0xA0, 0xA0, 0xA0)
 error = (0xFF, 0x40, 0x40)
 descend = (0x9F, 0x3F, 0xFF)
+ascend = (0xCF, 0x9F, 0xFF)
 
 # Text
 welcome_text = (0x20, 0xA0, 0xFF)
@@ -31,6 +32,13 @@ bar_text = white
 bar_filled = (0x0, 0x60, 0x0)
 bar_empty = (0x40, 0x10, 0x10)
 
+# Targeting overlay
+targeting_area = (0xC0, 0x30, 0x00)
+targeting_hit = (0xFF, 0xA0, 0x00)
+
+# Profiler overlay
+profiler_header = (0xFF, 0xFF, 0x3F)
+
 # Main menu
 menu_title = (255, 255, 63)
 menu_text_bg = (0x07, 0x6D, 0x16)
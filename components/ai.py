@@ -1,63 +1,71 @@
 """Class that holds basic AI for npcs."""
 from __future__ import annotations
 
-import random
-from typing import List, Optional, Tuple, TYPE_CHECKING
+from typing import List, Optional, Sequence, Tuple, TypeVar, TYPE_CHECKING
 
 import numpy as np  # type: ignore
-import tcod
 
 from actions import Action, BumpAction, MeleeAction, MovementAction, WaitAction
 
 if TYPE_CHECKING:
     from entity import Actor
 
+A = TypeVar("A", bound="BaseAI")
+
 
 class BaseAI(Action):
     """Class that holds basic AI for npcs."""
 
+    __slots__ = ()
+
     def perform(self) -> None:
         raise NotImplementedError()
 
-    def get_path_to(
-        self, dest_x: int, dest_y: int, blocking_cost: int = 10
-    ) -> List[Tuple[int, int]]:
-        """Compute and return a path to the target position.
+    @classmethod
+    def idle(cls, ais: Sequence[BaseAI]) -> np.ndarray:
+        """Return a mask of the AIs of this class that would do nothing this turn.
 
-        If there is no valid path then returns an empty list.
+        Called once a turn for all the AIs of a class, before any of them act, so
+        that idle actors can be skipped without calling `perform`. By default
+        every AI acts.
         """
-        # Copy the walkable array.
-        cost = np.array(self.entity.gamemap.tiles["walkable"], dtype=np.int8)
-
-        for entity in self.entity.gamemap.entities:
-            # Check that an entity blocks movement and the cost isn't zero (blocking.)
-            if entity.blocks_movement and cost[entity.x, entity.y]:
-                # Add to the cost of a blocked position.
-                # A lower number means more enemies will crowd behind each other in
-                # hallways.  A higher number means enemies will take longer paths in
-                # order to surround the player.
-                cost[entity.x, entity.y] += blocking_cost
-
-        # Create a graph from the cost array and pass that graph to a new pathfinder.
-        graph = tcod.path.SimpleGraph(cost=cost, cardinal=2, diagonal=3)
-        pathfinder = tcod.path.Pathfinder(graph)
-
-        pathfinder.add_root((self.entity.x, self.entity.y))  # Start position.
+        return np.zeros(len(ais), dtype=bool)
 
-        # Compute the path to the destination and remove the starting point.
-        path: List[List[int]] = pathfinder.path_to((dest_x, dest_y))[1:].tolist()
-
-        # Convert from List[List[int]] to List[Tuple[int, int]].
-        return [(index[0], index[1]) for index in path]
+    def clone(self: A, entity: Actor) -> A:
+        """Return a copy of this AI controlling `entity`."""
+        clone = self.shallow_copy()
+        clone.entity = entity
+        return clone
 
 
 class HostileEnemy(BaseAI):
     """An AI for hostile enemies."""
 
+    __slots__ = ("path",)
+
     def __init__(self, entity: Actor):
         super().__init__(entity)
         self.path: List[Tuple[int, int]] = []
 
+    def clone(self, entity: Actor) -> HostileEnemy:
+        """Return a copy of this AI controlling `entity`."""
+        clone = super().clone(entity)
+        clone.path = list(self.path)
+        return clone
+
+    @classmethod
+    def idle(cls, ais: Sequence[BaseAI]) -> np.ndarray:
+        """Enemies out of view with no path left to follow only wait."""
+        if not ais:
+            return np.zeros(0, dtype=bool)
+        game_map = ais[0].entity.gamemap
+        xs = np.fromiter((ai.entity.x for ai in ais), dtype=np.intp, count=len(ais))
+        ys = np.fromiter((ai.entity.y for ai in ais), dtype=np.intp, count=len(ais))
+        has_path = np.fromiter(
+            (bool(ai.path) for ai in ais), dtype=bool, count=len(ais)  # type: ignore
+        )
+        return ~game_map.visible[xs, ys] & ~has_path
+
     def perform(self) -> None:
         """If enemy is visible, target player and try to attack them."""
         target = self.engine.player
@@ -69,7 +77,7 @@ class HostileEnemy(BaseAI):
             if distance <= 1:
                 return MeleeAction(self.entity, dx, dy).perform()
 
-            self.path = self.get_path_to(target.x, target.y)
+            self.path = self.engine.flow_field.path_from(self.entity.x, self.entity.y)
 
         if self.path:
             dest_x, dest_y = self.path.pop(0)
@@ -90,6 +98,8 @@ class ConfusedEnemy(BaseAI):
     into, it will attack.
     """
 
+    __slots__ = ("previous_ai", "turns_remaining")
+
     def __init__(
         self, entity: Actor, previous_ai: Optional[BaseAI], turns_remaining: int
     ):
@@ -98,6 +108,13 @@ class ConfusedEnemy(BaseAI):
         self.previous_ai = previous_ai
         self.turns_remaining = turns_remaining
 
+    def clone(self, entity: Actor) -> ConfusedEnemy:
+        """Return a copy of this AI controlling `entity`."""
+        clone = super().clone(entity)
+        if self.previous_ai is not None:
+            clone.previous_ai = self.previous_ai.clone(entity)
+        return clone
+
     def perform(self) -> None:
         """Move in a random direction."""
         # Revert the AI back to the original state if the effect has run its course.
@@ -108,7 +125,7 @@ class ConfusedEnemy(BaseAI):
             self.entity.ai = self.previous_ai
         else:
             # Pick a random direction
-            direction_x, direction_y = random.choice(
+            direction_x, direction_y = self.engine.game_world.rng.choice(
                 [
                     (-1, -1),  # Northwest
                     (0, -1),  # North
@@ -1,17 +1,23 @@
 """File defining the basic functionality of any component."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TypeVar, TYPE_CHECKING
+
+from slotted import Slotted
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
     from game_map import GameMap
 
+C = TypeVar("C", bound="BaseComponent")
+
 
-class BaseComponent:
+class BaseComponent(Slotted):
     """Class defining the basic functionality of any component."""
 
+    __slots__ = ("parent",)
+
     parent: Entity  # Owning entity instance.
 
     @property
@@ -23,3 +29,12 @@ class BaseComponent:
     def engine(self) -> Engine:
         """Engine owning the entity this component is attached to."""
         return self.gamemap.engine
+
+    def clone(self: C, parent: Entity) -> C:
+        """Return a copy of this component owned by `parent`.
+
+        Subclasses holding mutable state must copy it here.
+        """
+        clone = self.shallow_copy()
+        clone.parent = parent
+        return clone
@@ -7,21 +7,24 @@ import actions
 import color
 import components.ai
 import components.inventory
+import targeting
 from components.base_component import BaseComponent
 from exceptions import ActionCannotBePerformed
-from input_handlers import (
-    ActionOrHandler,
-    AreaRangedAttackHandler,
-    SingleRangedAttackHandler,
-)
 
 if TYPE_CHECKING:
     from entity import Actor, Item
+    from input_handlers import (
+        ActionOrHandler,
+        AreaRangedAttackHandler,
+        SingleRangedAttackHandler,
+    )
 
 
 class Consumable(BaseComponent):
     """This class gives consumable functionality to an item."""
 
+    __slots__ = ()
+
     parent: Item
 
     def get_action(self, consumer: Actor) -> Optional[ActionOrHandler]:
@@ -46,6 +49,8 @@ class Consumable(BaseComponent):
 class HealingConsumable(Consumable):
     """This class gives healing consumable functionality to an item."""
 
+    __slots__ = ("amount",)
+
     def __init__(self, amount: int):
         self.amount = amount
 
@@ -67,6 +72,8 @@ class HealingConsumable(Consumable):
 class LightningDamageConsumable(Consumable):
     """A consumable that deals lightning damage to the closest target."""
 
+    __slots__ = ("damage", "maximum_range")
+
     def __init__(self, damage: int, maximum_range: int):
         self.damage = damage
         self.maximum_range = maximum_range
@@ -74,16 +81,13 @@ class LightningDamageConsumable(Consumable):
     def activate(self, action: actions.ItemAction) -> None:
         """Attack closest target with lightning damage."""
         consumer = action.entity
-        target = None
-        closest_distance = self.maximum_range + 1.0
-
-        for actor in self.engine.game_map.actors:
-            if actor is not consumer and self.parent.gamemap.visible[actor.x, actor.y]:
-                distance = consumer.distance(actor.x, actor.y)
-
-                if distance < closest_distance:
-                    target = actor
-                    closest_distance = distance
+        target = targeting.nearest_visible_actor(
+            self.engine.game_map,
+            consumer.x,
+            consumer.y,
+            closer_than=self.maximum_range + 1.0,
+            exclude=consumer,
+        )
 
         if target:
             self.engine.message_log.add_message(
@@ -98,11 +102,16 @@ class LightningDamageConsumable(Consumable):
 class ConfusionConsumable(Consumable):
     """A consumable that confuses it's target, making the target move randomly."""
 
+    __slots__ = ("number_of_turns",)
+
     def __init__(self, number_of_turns: int):
         self.number_of_turns = number_of_turns
 
     def get_action(self, consumer: Actor) -> SingleRangedAttackHandler:
         """Switch input handlers to target enemy."""
+        # Imported here so item templates load without every input handler.
+        from input_handlers import SingleRangedAttackHandler
+
         self.engine.message_log.add_message(
             "Select a target location.", color.needs_target
         )
@@ -141,12 +150,16 @@ class ConfusionConsumable(Consumable):
 class FireballDamageConsumable(Consumable):
     """Class representing a fireball damage consumable."""
 
+    __slots__ = ("damage", "radius")
+
     def __init__(self, damage: int, radius: int):
         self.damage = damage
         self.radius = radius
 
     def get_action(self, consumer: Actor) -> AreaRangedAttackHandler:
         """Switch input handlers to target area for affect."""
+        from input_handlers import AreaRangedAttackHandler
+
         self.engine.message_log.add_message(
             "Select a target location.", color.needs_target
         )
@@ -164,16 +177,19 @@ class FireballDamageConsumable(Consumable):
             raise ActionCannotBePerformed(
                 "You cannot target an area that you cannot see."
             )
+        if not self.engine.game_map.tiles["transparent"][target_xy]:
+            raise ActionCannotBePerformed("You cannot target the inside of a wall.")
 
-        targets_hit = False
-        for actor in self.engine.game_map.actors:
-            if actor.distance(*target_xy) <= self.radius:
-                self.engine.message_log.add_message(
-                    f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
-                )
-                actor.fighter.take_damage(self.damage)
-                targets_hit = True
+        # Walls shelter whatever is behind them from the explosion.
+        targets = targeting.actors_in_blast(
+            self.engine.game_map, *target_xy, self.radius
+        )
+        for actor in targets:
+            self.engine.message_log.add_message(
+                f"The {actor.name} is engulfed in a fiery explosion, taking {self.damage} damage!"
+            )
+            actor.fighter.take_damage(self.damage)
 
-        if not targets_hit:
+        if not targets:
             raise ActionCannotBePerformed("There are no targets in the radius.")
         self.consume()
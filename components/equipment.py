@@ -13,12 +13,27 @@ if TYPE_CHECKING:
 class Equipment(BaseComponent):
     """Component enabling having equipment."""
 
+    __slots__ = ("weapon", "armor")
+
     parent: Actor
 
     def __init__(self, weapon: Optional[Item] = None, armor: Optional[Item] = None):
         self.weapon = weapon
         self.armor = armor
 
+    def clone(self, parent: Actor) -> Equipment:
+        """Return a copy of this equipment, wearing the copies of its items.
+
+        The inventory of `parent` must already be a clone of this one's owner.
+        """
+        clone = super().clone(parent)
+        items = self.parent.inventory.items
+        if self.weapon is not None:
+            clone.weapon = parent.inventory.items[items.index(self.weapon)]
+        if self.armor is not None:
+            clone.armor = parent.inventory.items[items.index(self.armor)]
+        return clone
+
     @property
     def defense_bonus(self) -> int:
         """The defense bonus of the equipment."""
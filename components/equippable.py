@@ -13,6 +13,8 @@ if TYPE_CHECKING:
 class Equippable(BaseComponent):
     """Component that holds functionality for allowing an item to be equipped."""
 
+    __slots__ = ("equipment_type", "power_bonus", "defense_bonus")
+
     parent: Item
 
     def __init__(
@@ -30,6 +32,8 @@ class Equippable(BaseComponent):
 class Dagger(Equippable):
     """A dagger."""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=2)
 
@@ -37,6 +41,8 @@ class Dagger(Equippable):
 class Sword(Equippable):
     """A sword."""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.WEAPON, power_bonus=4)
 
@@ -44,6 +50,8 @@ class Sword(Equippable):
 class LeatherArmor(Equippable):
     """Some leather armor."""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=1)
 
@@ -51,5 +59,7 @@ class LeatherArmor(Equippable):
 class ChainMail(Equippable):
     """A mail of chain."""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
         super().__init__(equipment_type=EquipmentType.ARMOR, defense_bonus=3)
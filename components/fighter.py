@@ -14,6 +14,8 @@ if TYPE_CHECKING:
 class Fighter(BaseComponent):
     """Component that enable fighting for an entity."""
 
+    __slots__ = ("max_hp", "_hp", "base_defense", "base_power")
+
     parent: Actor
 
     def __init__(self, hp: int, base_defense: int, base_power: int):
@@ -86,5 +88,6 @@ class Fighter(BaseComponent):
         self.parent.ai = None
         self.parent.name = f"Remains of {self.parent.name}"
         self.parent.render_order = RenderOrder.CORPSE
+        self.gamemap.update_entity(self.parent)
 
         self.engine.message_log.add_message(death_message, death_message_color)
@@ -12,12 +12,24 @@ if TYPE_CHECKING:
 class Inventory(BaseComponent):
     """Class that holds functionality for an inventory."""
 
+    __slots__ = ("capacity", "items")
+
     parent: Actor
 
     def __init__(self, capacity: int):
         self.capacity = capacity
         self.items: List[Item] = []
 
+    def clone(self, parent: Actor) -> Inventory:
+        """Return a copy of this inventory, with copies of its items."""
+        clone = super().clone(parent)
+        clone.items = []
+        for item in self.items:
+            item_clone = item.clone()
+            item_clone.parent = clone
+            clone.items.append(item_clone)
+        return clone
+
     def drop(self, item: Item) -> None:
         """Removes item from the inventory and drop it as player's location on map."""
         self.items.remove(item)
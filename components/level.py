@@ -12,6 +12,14 @@ if TYPE_CHECKING:
 class Level(BaseComponent):
     """Provides leveling functionality to an actor."""
 
+    __slots__ = (
+        "current_level",
+        "current_xp",
+        "level_up_base",
+        "level_up_factor",
+        "xp_given",
+    )
+
     parent: Actor
 
     def __init__(
@@ -1,26 +1,166 @@
 """Class to hold configuration."""
+import functools
 import os
 from pathlib import Path
+from typing import Any, Dict
 
 import yaml
 
+NONE = type(None)
+
+SCHEMA: Dict[str, Any] = {
+    "ai": {"activity_radius": int, "awake_turns": int, "fight_noise_radius": int},
+    "floors": {"hot": int},
+    "hot_reload": bool,
+    "message_log": {"capacity": int, "archive": (str, NONE)},
+    "player": {"fov": {"radius": int}},
+    "procgen": {
+        "generator": str,
+        "generators": dict,
+        "stairs_percentile": (int, float, NONE),
+        "pregenerate": bool,
+        "rooms": {
+            "max_items_by_floor": list,
+            "max_monsters_by_floor": list,
+            "max_items_per_room": int,
+            "max_monsters_per_room": int,
+            "max_rooms": int,
+            "max_size": int,
+            "min_size": int,
+        },
+    },
+    "profiler": {"enabled": bool, "history": int, "trace_events": int},
+    "replay": {"record": bool},
+    "save": {
+        "compression_level": int,
+        "autosave": {"every_n_turns": int, "on_floor_change": bool},
+    },
+    "view": {
+        "dungeon_level": {"x": int, "y": int},
+        "examine_ui": {"x": int, "y": int},
+        "health_bar": {"width": int},
+        "map": {"width": int, "height": int},
+        "menu": {"width": int},
+        "message_log": {"height": int, "width": int, "x": int, "y": int},
+        "messages": {"welcome_message": str},
+        "screen": {"width": int, "height": int},
+        "title": str,
+    },
+    "paths": {
+        "asset_cache": str,
+        "floor_cache": str,
+        "journal": str,
+        "profile_trace": str,
+        "tileset": str,
+    },
+}
+"""The sections and settings of config.yml, with the types each setting may have."""
+
+
+class ConfigError(Exception):
+    """Raised when the configuration file can not be read or does not fit SCHEMA."""
+
+
+def validate(value: Any, schema: Any, path: str = "config") -> None:
+    """Check that a loaded value has every setting of a schema, of the right type."""
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            raise ConfigError(f"{path}: expected a section, got {value!r}")
+        missing = schema.keys() - value.keys()
+        if missing:
+            raise ConfigError(f"{path}: missing {', '.join(sorted(missing))}")
+        unknown = value.keys() - schema.keys()
+        if unknown:
+            raise ConfigError(f"{path}: unknown {', '.join(sorted(unknown))}")
+        for key, child in schema.items():
+            validate(value[key], child, f"{path}.{key}")
+        return
+
+    types = schema if isinstance(schema, tuple) else (schema,)
+    # YAML booleans are ints to isinstance, but never a valid number setting.
+    if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+        expected = " or ".join(t.__name__ for t in types)
+        raise ConfigError(f"{path}: expected {expected}, got {value!r}")
+
 
 class Config:
-    """Load and validate the configuration file."""
+    """Load and validate the configuration file.
+
+    Settings looked up on every turn or frame are also kept as attributes, so
+    they are only looked up again when the file is reloaded.
+    """
 
     def __init__(self, config_file_name: str = "config.yml"):
         """Initialize."""
 
         self.root_dir = Path(os.getcwd())
-        with open(self.root_dir / config_file_name) as filein:
-            self.config = yaml.safe_load(filein)
+        self.file_path = self.root_dir / config_file_name
+        self.modified = 0
+        self.load()
+
+    def load(self) -> None:
+        """Read and validate the configuration file, and apply it if it is valid."""
+        self.modified = os.stat(self.file_path).st_mtime_ns
+        try:
+            with open(self.file_path) as filein:
+                config = yaml.safe_load(filein)
+        except yaml.YAMLError as exc:
+            raise ConfigError(f"{self.file_path}: {exc}") from exc
+        validate(config, SCHEMA)
+
+        self.config = config
+        self.ai = self.config["ai"]
+        self.floors = self.config["floors"]
+        self.hot_reload = self.config["hot_reload"]
+        self.message_log = self.config["message_log"]
         self.player = self.config["player"]
         self.procgen = self.config["procgen"]
+        self.profiler = self.config["profiler"]
+        self.replay = self.config["replay"]
+        self.save = self.config["save"]
         self.view = self.config["view"]
 
         self.relative_paths = self.config["paths"]
         self.paths = self.make_absolute_paths()
 
+        view = self.view
+        self.fov_radius: int = self.player["fov"]["radius"]
+        self.screen_size = (view["screen"]["width"], view["screen"]["height"])
+        self.message_log_region = (
+            view["message_log"]["x"],
+            view["message_log"]["y"],
+            view["message_log"]["width"],
+            view["message_log"]["height"],
+        )
+        self.health_bar_width: int = view["health_bar"]["width"]
+        self.health_bar_y: int = view["map"]["height"] + 2
+        self.dungeon_level_location = (
+            view["dungeon_level"]["x"],
+            view["dungeon_level"]["y"],
+        )
+        self.examine_ui_location = (view["examine_ui"]["x"], view["examine_ui"]["y"])
+
+    def reload_if_changed(self) -> bool:
+        """Load the file again if it was modified since it was last loaded.
+
+        Returns True if it was reloaded. A file that fails to load raises
+        ConfigError once, and the settings from before stay in use. So do they
+        while the file is missing, such as when an editor replaces it.
+        """
+        try:
+            if os.stat(self.file_path).st_mtime_ns == self.modified:
+                return False
+            self.load()
+        except OSError:
+            return False
+        return True
+
     def make_absolute_paths(self):
         """Get paths as absolute paths."""
         return {key: self.root_dir / path for key, path in self.relative_paths.items()}
+
+
+@functools.lru_cache(maxsize=None)
+def get_config() -> Config:
+    """Return the configuration shared by the whole game, loading it on first use."""
+    return Config()
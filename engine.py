@@ -1,21 +1,35 @@
 """Engine functionality."""
 from __future__ import annotations
 
-import lzma
-import pickle
-from typing import TYPE_CHECKING
+from typing import NamedTuple, Optional, Tuple, TYPE_CHECKING
 
+import numpy as np  # type: ignore
 from tcod.console import Console
 from tcod.map import compute_fov
 
-import exceptions
-from config import Config
+from config import Config, get_config
+from flow_field import FlowField
+import floor_store
 from message_log import MessageLog
+from render_cache import RenderCache
 import render_functions
+import save_format
+from turn_scheduler import TurnScheduler
 
 if TYPE_CHECKING:
     from entity import Actor
     from game_map import GameMap, GameWorld
+    from replay import ActionJournal
+
+
+class FovCache(NamedTuple):
+    """The inputs of the last field of view computed."""
+
+    game_map: GameMap
+    origin: Tuple[int, int]
+    radius: int
+    window: Tuple[slice, slice]
+    transparent: np.ndarray
 
 
 class Engine:
@@ -25,73 +39,161 @@ class Engine:
     game_world: GameWorld
 
     def __init__(self, player: Actor):
-        self.config = Config()
-        self.message_log = MessageLog()
+        self.message_log = MessageLog(self.config.message_log["capacity"])
         self.mouse_location = (0, 0)
         self.player = player
-
-    def save_as(self, filename: str) -> None:
-        """Save this Engine instance as a compressed file."""
-        save_data = lzma.compress(pickle.dumps(self))
-        with open(filename, "wb") as f:
-            f.write(save_data)
+        self.turn_count = 0
+        self.flow_field = FlowField(self)
+        self.scheduler = TurnScheduler(self)
+        self.fov_cache: Optional[FovCache] = None
+        self.render_cache = RenderCache(*self.config.screen_size)
+        # Records the player's actions, for games started from the main menu.
+        self.journal: Optional[ActionJournal] = None
+
+    def close_journal(self) -> None:
+        """Stop recording the player's actions, closing the journal file."""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def close(self) -> None:
+        """Close the files the game writes to as it is played."""
+        self.close_journal()
+        if self.message_log.archive is not None:
+            self.message_log.archive.close()
+
+    @property
+    def config(self) -> Config:
+        """The settings shared by the whole game, which are never saved with it."""
+        return get_config()
+
+    def save_as(self, filename: str) -> int:
+        """Save this Engine instance as a compressed file.
+
+        Returns the number of bytes written.
+        """
+        loaded = self.game_world.floors.take_loaded()
+        bytes_written = save_format.save_engine(
+            self, filename, compression_level=self.config.save["compression_level"]
+        )
+        floor_store.remove_files(loaded)
+        return bytes_written
 
     def handle_npc_turns(self) -> None:
-        """Handle each NPC's turn."""
-        for entity in set(self.game_map.actors) - {self.player}:
-            if entity.ai:
-                try:
-                    entity.ai.perform()
-                except exceptions.ActionCannotBePerformed:
-                    pass  # Ignore failed action exceptions from AI.
+        """Handle each NPC's turn, which ends the current game turn."""
+        # Actors chase the player on a distance map shared for the whole turn.
+        self.flow_field.refresh()
+        self.scheduler.handle_turns()
+        self.turn_count += 1
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
-            (self.player.x, self.player.y),
-            radius=self.config.player["fov"]["radius"],
-        )
+        """Recompute the visible area based on the players point of view.
+
+        Only the window of the FOV radius around the player is recomputed, and
+        nothing is recomputed if neither the player nor the tiles in view changed.
+        """
+        game_map = self.game_map
+        origin = (self.player.x, self.player.y)
+        radius = self.config.fov_radius
+
+        if radius > 0:
+            x0, y0 = max(0, origin[0] - radius), max(0, origin[1] - radius)
+            window = (
+                slice(x0, origin[0] + radius + 1),
+                slice(y0, origin[1] + radius + 1),
+            )
+        else:  # A radius of 0 is unlimited.
+            x0, y0 = 0, 0
+            window = (slice(None), slice(None))
+        transparent = game_map.tiles["transparent"][window]
+
+        cache = self.fov_cache
+        if cache is not None and cache.game_map is game_map:
+            if (
+                cache.origin == origin
+                and cache.radius == radius
+                and np.array_equal(cache.transparent, transparent)
+            ):
+                return  # Nothing the player can see has changed.
+            game_map.visible[cache.window] = False
+        else:
+            game_map.visible[:] = False
+
+        visible = compute_fov(transparent, (origin[0] - x0, origin[1] - y0), radius)
+        game_map.visible[window] = visible
         # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored[window] |= visible
+
+        self.fov_cache = FovCache(game_map, origin, radius, window, transparent.copy())
 
     def render(self, console: Console) -> None:
-        """Render entities on console."""
-        self.game_map.render(console)
-
-        # TODO: consider moving the render config directly into message log
-        self.message_log.render(
-            console=console,
-            x=self.config.view["message_log"]["x"],
-            y=self.config.view["message_log"]["y"],
-            width=self.config.view["message_log"]["width"],
-            height=self.config.view["message_log"]["height"],
+        """Render entities on console.
+
+        The frame is composed on the render cache, which only redraws what changed
+        since the previous frame, and then copied onto the console.
+        """
+        cache = self.render_cache
+        cache.render_map(self.game_map)
+
+        config = self.config
+        messages = self.message_log.messages
+        cache.render_widget(
+            "message_log",
+            key=(len(self.message_log), id(messages[-1]), messages[-1].count)
+            if messages
+            else None,
+            region=config.message_log_region,
+            draw=lambda layer: self.message_log.render(
+                layer, *config.message_log_region
+            ),
         )
 
         # Render health bar
-        render_functions.render_status_bar(
-            console=console,
-            status_type="HP",
-            current_value=self.player.fighter.hp,
-            maximum_value=self.player.fighter.max_hp,
-            width=self.config.view["health_bar"]["width"],
-            y=self.config.view["map"]["height"] + 2,
+        health_bar_width = config.health_bar_width
+        health_bar_y = config.health_bar_y
+        cache.render_widget(
+            "health_bar",
+            key=(self.player.fighter.hp, self.player.fighter.max_hp),
+            region=(0, health_bar_y, health_bar_width, 1),
+            draw=lambda layer: render_functions.render_status_bar(
+                console=layer,
+                status_type="HP",
+                current_value=self.player.fighter.hp,
+                maximum_value=self.player.fighter.max_hp,
+                width=health_bar_width,
+                y=health_bar_y,
+            ),
         )
 
         # Render dungeon level
-        render_functions.render_dungeon_level(
-            console=console,
-            dungeon_level=self.game_world.current_floor,
-            location=(
-                self.config.view["dungeon_level"]["x"],
-                self.config.view["dungeon_level"]["y"],
+        dungeon_level_location = config.dungeon_level_location
+        cache.render_widget(
+            "dungeon_level",
+            key=self.game_world.current_floor,
+            region=(
+                *dungeon_level_location,
+                len(f"Dungeon level: {self.game_world.current_floor}"),
+                1,
+            ),
+            draw=lambda layer: render_functions.render_dungeon_level(
+                console=layer,
+                dungeon_level=self.game_world.current_floor,
+                location=dungeon_level_location,
             ),
         )
 
         # Render examine ui
-        render_functions.render_names_at_mouse_location(
-            console=console,
-            x=self.config.view["examine_ui"]["x"],
-            y=self.config.view["examine_ui"]["y"],
-            engine=self,
+        examine_ui_x, examine_ui_y = config.examine_ui_location
+        names = render_functions.get_names_at_location(
+            *self.mouse_location, game_map=self.game_map
         )
+        cache.render_widget(
+            "examine_ui",
+            key=tuple(names),
+            region=(examine_ui_x, examine_ui_y, len(", ".join(names)), 1),
+            draw=lambda layer: render_functions.render_names_at_mouse_location(
+                console=layer, x=examine_ui_x, y=examine_ui_y, engine=self
+            ),
+        )
+
+        cache.blit(console)
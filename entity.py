@@ -1,11 +1,11 @@
 """Class containing the base entity functionality."""
 from __future__ import annotations
 
-import copy
 import math
 from typing import Optional, Tuple, Type, TypeVar, TYPE_CHECKING, Union
 
 from render_order import RenderOrder
+from slotted import Slotted
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -20,11 +20,22 @@ if TYPE_CHECKING:
 T = TypeVar("T", bound="Entity")
 
 
-class Entity:
+class Entity(Slotted):
     """
     A generic object to represent players, enemies, items, etc.
     """
 
+    __slots__ = (
+        "parent",
+        "x",
+        "y",
+        "char",
+        "color",
+        "name",
+        "blocks_movement",
+        "render_order",
+    )
+
     parent: Union[GameMap, Inventory]
 
     def __init__(
@@ -48,32 +59,45 @@ class Entity:
         if parent:
             # If parent isn't provided now then it will be set later.
             self.parent = parent
-            parent.entities.add(self)
+            parent.add_entity(self)
 
     @property
     def gamemap(self) -> GameMap:
         """Return parent gamemap."""
         return self.parent.gamemap
 
+    def clone(self: T) -> T:
+        """Return a copy of this entity sharing no mutable state with it.
+
+        The entity is copied shallowly and each component then copies only its
+        own state, which is far cheaper than `copy.deepcopy` or `copy.copy`.
+        """
+        return self.shallow_copy()
+
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
-        gamemap.entities.add(clone)
+        gamemap.add_entity(clone)
         return clone
 
     def place(self, x: int, y: int, gamemap: Optional[GameMap] = None) -> None:
         """Place this entity at a new location. Handles moving across GameMaps."""
-        self.x = x
-        self.y = y
+        on_map = hasattr(self, "parent") and self.parent is self.gamemap
         if gamemap:
-            if hasattr(self, "parent") and self.parent is self.gamemap:
-                if self.parent is self.gamemap:
-                    self.gamemap.entities.remove(self)
+            if on_map:
+                self.gamemap.remove_entity(self)
+            self.x = x
+            self.y = y
             self.parent = gamemap
-            gamemap.entities.add(self)
+            gamemap.add_entity(self)
+        elif on_map:
+            self.gamemap.relocate_entity(self, x, y)
+        else:
+            self.x = x
+            self.y = y
 
     def distance(self, x: int, y: int) -> float:
         """Return l2 distance between entity and the given (x, y) coordinate."""
@@ -81,13 +105,23 @@ class Entity:
 
     def move(self, dx: int, dy: int) -> None:
         """Move entity by given amount."""
-        self.x += dx
-        self.y += dy
+        self.place(self.x + dx, self.y + dy)
 
 
 class Actor(Entity):
     """Class for actor entities."""
 
+    __slots__ = (
+        "ai",
+        "equipment",
+        "fighter",
+        "inventory",
+        "level",
+        "speed",
+        "energy",
+        "awake_until",
+    )
+
     def __init__(
         self,
         *,
@@ -101,6 +135,7 @@ class Actor(Entity):
         fighter: Fighter,
         inventory: Inventory,
         level: Level,
+        speed: int = 100,
     ):
         super().__init__(
             x=x,
@@ -125,6 +160,22 @@ class Actor(Entity):
         self.level = level
         self.level.parent = self
 
+        # Energy gained per turn; every action spends turn_scheduler.ACTION_COST.
+        self.speed = speed
+        self.energy = 0
+        # Noise keeps the actor active, however far from the player, until this turn.
+        self.awake_until = 0
+
+    def clone(self) -> Actor:
+        """Return a copy of this actor with copies of its components."""
+        clone = super().clone()
+        clone.ai = self.ai.clone(clone) if self.ai is not None else None
+        clone.fighter = self.fighter.clone(clone)
+        clone.inventory = self.inventory.clone(clone)
+        clone.equipment = self.equipment.clone(clone)
+        clone.level = self.level.clone(clone)
+        return clone
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
@@ -134,6 +185,8 @@ class Actor(Entity):
 class Item(Entity):
     """A class representing an item."""
 
+    __slots__ = ("consumable", "equippable")
+
     def __init__(
         self,
         *,
@@ -162,3 +215,12 @@ class Item(Entity):
         self.equippable = equippable
         if self.equippable:
             self.equippable.parent = self
+
+    def clone(self) -> Item:
+        """Return a copy of this item with copies of its components."""
+        clone = super().clone()
+        if self.consumable is not None:
+            clone.consumable = self.consumable.clone(clone)
+        if self.equippable is not None:
+            clone.equippable = self.equippable.clone(clone)
+        return clone
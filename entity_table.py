@@ -0,0 +1,168 @@
+"""Array-backed copy of the entities on a map, for vectorized queries."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from entity import Actor, Item
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+# Values of the type_id column.
+ENTITY = 0
+ACTOR = 1
+ITEM = 2
+
+ENTITY_DTYPE = np.dtype(
+    [
+        ("x", np.int32),
+        ("y", np.int32),
+        ("blocks_movement", bool),
+        ("alive", bool),
+        # The turn until which noise keeps an actor active, see Actor.awake_until.
+        ("awake_until", np.int64),
+        ("render_order", np.uint8),
+        ("type_id", np.uint8),
+        # Increases with every entity added, to order query results.
+        ("sequence", np.int64),
+    ]
+)
+
+
+def type_id(entity: Entity) -> int:
+    """Return the type_id column value for an entity."""
+    if isinstance(entity, Actor):
+        return ACTOR
+    if isinstance(entity, Item):
+        return ITEM
+    return ENTITY
+
+
+class EntityTable:
+    """One row of NumPy columns per entity on a map.
+
+    The GameMap keeps the table in sync with its entities: rows are added,
+    removed and moved along with them, and `GameMap.update_entity` must be
+    called after an entity's blocks_movement, render_order or aliveness changes.
+
+    Rows are kept packed by moving the last row into any removed one. Queries
+    take and return row masks over `columns`, and `select` turns a mask into
+    entities in the same order as iterating `GameMap.entities`.
+
+    `version` changes whenever an entity is added or removed or its state is
+    updated, but not when one moves, so results derived from anything but
+    locations can be cached against it.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.length = 0
+        self.version = 0
+        self.next_sequence = 0
+        self.rows: Dict[Entity, int] = {}
+        self.entities: List[Entity] = []
+        self.data = np.zeros(capacity, dtype=ENTITY_DTYPE)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def columns(self) -> np.ndarray:
+        """The valid rows of the table."""
+        return self.data[: self.length]
+
+    def add(self, entity: Entity) -> None:
+        """Add a row for an entity."""
+        if self.length == len(self.data):
+            self.data = np.resize(self.data, len(self.data) * 2)
+        row = self.rows[entity] = self.length
+        self.entities.append(entity)
+        self.length += 1
+        self.data[row] = (
+            entity.x,
+            entity.y,
+            entity.blocks_movement,
+            isinstance(entity, Actor) and entity.is_alive,
+            entity.awake_until if isinstance(entity, Actor) else 0,
+            entity.render_order.value,
+            type_id(entity),
+            self.next_sequence,
+        )
+        self.next_sequence += 1
+        self.version += 1
+
+    def remove(self, entity: Entity) -> None:
+        """Remove an entity's row, moving the last row into its place."""
+        row = self.rows.pop(entity)
+        last = self.length - 1
+        moved = self.entities.pop()
+        if row != last:
+            self.data[row] = self.data[last]
+            self.entities[row] = moved
+            self.rows[moved] = row
+        self.length -= 1
+        self.version += 1
+
+    def move(self, entity: Entity) -> None:
+        """Copy an entity's new location into its row."""
+        row = self.data[self.rows[entity]]
+        row["x"] = entity.x
+        row["y"] = entity.y
+
+    def update(self, entity: Entity) -> None:
+        """Copy the state of an entity that may have changed into its row."""
+        row = self.data[self.rows[entity]]
+        row["blocks_movement"] = entity.blocks_movement
+        row["alive"] = isinstance(entity, Actor) and entity.is_alive
+        row["render_order"] = entity.render_order.value
+        self.version += 1
+
+    def ordered_rows(self, mask: np.ndarray) -> np.ndarray:
+        """Return the indices of the rows selected by `mask`, in query order."""
+        rows = np.flatnonzero(mask)
+        return rows[np.argsort(self.data["sequence"][rows])]
+
+    def select(self, mask: np.ndarray) -> List[Entity]:
+        """Return the entities of the rows selected by `mask`, in query order."""
+        entities = self.entities
+        return [entities[row] for row in self.ordered_rows(mask).tolist()]
+
+    def living_actors(self) -> np.ndarray:
+        """Return a row mask of the actors that are alive."""
+        return self.columns["alive"].copy()
+
+    def on_tiles(self, tiles: np.ndarray) -> np.ndarray:
+        """Return a row mask of the entities standing on True tiles of a map array."""
+        columns = self.columns
+        return tiles[columns["x"], columns["y"]]
+
+    def at_tile(self, x: int, y: int) -> np.ndarray:
+        """Return a row mask of the entities at a location."""
+        columns = self.columns
+        return (columns["x"] == x) & (columns["y"] == y)
+
+    def distances(self, x: int, y: int) -> np.ndarray:
+        """Return the distance of every row from a location, as Entity.distance."""
+        columns = self.columns
+        return np.sqrt((columns["x"] - x) ** 2.0 + (columns["y"] - y) ** 2.0)
+
+    def within_radius(self, x: int, y: int, radius: float) -> np.ndarray:
+        """Return a row mask of the entities at most `radius` from a location."""
+        return self.distances(x, y) <= radius
+
+    def nearest(
+        self, x: int, y: int, mask: np.ndarray, closer_than: float
+    ) -> Optional[Entity]:
+        """Return the masked entity nearest to a location, if any is close enough.
+
+        Ties go to the entity that comes first in query order.
+        """
+        rows = self.ordered_rows(mask)
+        if not len(rows):
+            return None
+        distances = self.distances(x, y)[rows]
+        nearest = int(np.argmin(distances))
+        if distances[nearest] >= closer_than:
+            return None
+        return self.entities[rows[nearest]]
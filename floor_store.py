@@ -0,0 +1,147 @@
+"""Keeps the maps of visited floors, spilling the least recently used to disk."""
+from __future__ import annotations
+
+import os
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+# A single worker shared by every game writes evicted floors out.
+writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="floor-cache")
+
+
+class FloorStore:
+    """The maps of every floor visited in a run.
+
+    At most `hot_floors` maps are kept in memory. When another is added, the least
+    recently used map is written to a file in `cache_dir` on a background thread
+    and dropped, then read back the next time its floor is visited. The file is
+    deleted once a save that no longer refers to it is written (see
+    `take_loaded`). Each write goes to a new file, so a floor evicted again never
+    overwrites a file that is about to be deleted. Files are named after
+    `run_id`, so runs sharing a cache directory never collide, and `prune` can
+    clean up after abandoned runs.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        cache_dir: str,
+        hot_floors: int = 3,
+        run_id: Optional[str] = None,
+        compression_level: int = 6,
+    ):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.hot_floors = max(1, hot_floors)
+        self.run_id = run_id or uuid.uuid4().hex
+        self.compression_level = compression_level
+
+        self.hot: OrderedDict[int, GameMap] = OrderedDict()
+        self.cold: Dict[int, str] = {}  # Floor number to cache file.
+        self.writes: Dict[int, Future[int]] = {}
+        # Cache files read back, which the last save may still refer to.
+        self.loaded: List[str] = []
+
+    def __contains__(self, floor: int) -> bool:
+        return floor in self.hot or floor in self.cold
+
+    def path(self, floor: int) -> str:
+        """Return a new cache file name for a floor."""
+        name = f"{self.run_id}-{floor}-{uuid.uuid4().hex[:8]}.floor"
+        return os.path.join(self.cache_dir, name)
+
+    def put(self, floor: int, game_map: GameMap) -> None:
+        """Store the map of a floor as the most recently used one."""
+        self.hot[floor] = game_map
+        self.hot.move_to_end(floor)
+        self.cold.pop(floor, None)
+        while len(self.hot) > self.hot_floors:
+            self.evict(next(iter(self.hot)))
+
+    def evict(self, floor: int) -> None:
+        """Move a floor from memory to its cache file."""
+        import save_format
+
+        # Nothing touches a map once it is evicted, so it is safe to encode it on
+        # the worker thread as well.
+        game_map = self.hot.pop(floor)
+        path = self.cold[floor] = self.path(floor)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.writes[floor] = writer.submit(
+            save_format.save_map, game_map, path, self.compression_level
+        )
+
+    def get(self, floor: int) -> Optional[GameMap]:
+        """Return the map of a floor, reading it back from disk if needed.
+
+        Returns None for floors that were never stored, or whose cache file is
+        gone or from another version of the game; such floors have to be
+        generated again.
+        """
+        import save_format
+
+        if floor in self.hot:
+            self.hot.move_to_end(floor)
+            return self.hot[floor]
+        path = self.cold.pop(floor, None)
+        if path is None:
+            return None
+
+        write = self.writes.pop(floor, None)
+        if write is not None:
+            write.result()
+        try:
+            game_map = save_format.load_map(path, self.engine)
+        except (FileNotFoundError, save_format.SaveFormatError):
+            return None
+        self.loaded.append(path)
+        self.put(floor, game_map)
+        return game_map
+
+    def flush(self) -> None:
+        """Block until every evicted floor is on disk."""
+        for write in self.writes.values():
+            write.result()
+        self.writes.clear()
+
+    def take_loaded(self) -> List[str]:
+        """Return the cache files read back since the last call, and forget them.
+
+        A save taken now no longer refers to them, so whoever writes it should
+        pass them to `remove_files` once it is on disk. Files still holding a
+        cold floor are never returned.
+        """
+        cold = set(self.cold.values())
+        loaded = [path for path in self.loaded if path not in cold]
+        self.loaded = []
+        return loaded
+
+    def clear(self) -> None:
+        """Forget every floor and delete their cache files."""
+        self.flush()
+        remove_files(self.cold.values())
+        remove_files(self.take_loaded())
+        self.hot.clear()
+        self.cold.clear()
+
+    def prune(self) -> None:
+        """Delete the cache files of every other run from the cache directory."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        prefix = f"{self.run_id}-"
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".floor") and not name.startswith(prefix):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+def remove_files(paths: Iterable[str]) -> None:
+    """Delete floor cache files, skipping any that are already gone."""
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,88 @@
+"""Shared pathfinding towards the player."""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+import tcod
+
+if TYPE_CHECKING:
+    from engine import Engine
+    from game_map import GameMap
+
+
+class FlowField:
+    """A Dijkstra distance map rooted at the player.
+
+    Every actor chasing the player walks downhill on the same map, so a turn costs
+    one pathfind no matter how many actors are chasing.
+    """
+
+    def __init__(self, engine: Engine, blocking_cost: int = 10):
+        self.engine = engine
+        # A lower number means more enemies will crowd behind each other in
+        # hallways.  A higher number means enemies will take longer paths in
+        # order to surround the player.
+        self.blocking_cost = blocking_cost
+        self.distance: Optional[np.ndarray] = None
+        self.game_map: Optional[GameMap] = None
+        self.root = (0, 0)
+        # The tiles holding a blocking entity, as sorted flat indices into the map.
+        self.blockers = np.zeros(0, dtype=np.intp)
+
+    def refresh(self) -> None:
+        """Mark the distance map stale if the player or any blocker has moved."""
+        game_map = self.engine.game_map
+        player = self.engine.player
+        columns = game_map.entity_table.columns
+        blocking = columns["blocks_movement"]
+        blockers = np.unique(
+            np.ravel_multi_index(
+                (columns["x"][blocking], columns["y"][blocking]),
+                (game_map.width, game_map.height),
+            )
+        )
+
+        if (
+            game_map is not self.game_map
+            or (player.x, player.y) != self.root
+            or not np.array_equal(blockers, self.blockers)
+        ):
+            self.game_map = game_map
+            self.root = player.x, player.y
+            self.blockers = blockers
+            self.distance = None  # Recomputed the next time a path is requested.
+
+    def compute(self) -> np.ndarray:
+        """Compute the distance from every tile to the player."""
+        assert self.game_map is not None
+        # Copy the walkable array.
+        cost = np.array(self.game_map.tiles["walkable"], dtype=np.int8)
+
+        if len(self.blockers):
+            # Add to the cost of every walkable position holding a blocking entity.
+            xs, ys = np.unravel_index(self.blockers, cost.shape)
+            walkable = cost[xs, ys] > 0
+            cost[xs[walkable], ys[walkable]] += self.blocking_cost
+
+        distance = tcod.path.maxarray(cost.shape, dtype=np.int32, order="F")
+        distance[self.root] = 0
+        tcod.path.dijkstra2d(distance, cost, 2, 3, out=distance)
+        return distance
+
+    def path_from(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """Return the path from (x, y) to the player, excluding the start point.
+
+        If there is no valid path then returns an empty list.
+        """
+        if self.game_map is not self.engine.game_map:
+            self.refresh()
+        if self.distance is None:
+            self.distance = self.compute()
+
+        path: List[List[int]] = tcod.path.hillclimb2d(
+            self.distance, (x, y), True, True
+        )[1:].tolist()
+
+        # Convert from List[List[int]] to List[Tuple[int, int]].
+        return [(index[0], index[1]) for index in path]
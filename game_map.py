@@ -1,15 +1,18 @@
 """Holds data related to the game map."""
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
 import numpy as np  # type: ignore
-from tcod.console import Console
 
 import tile_types
 from entity import Actor, Item
+from entity_table import EntityTable, ITEM
+from map_analysis import UNREACHABLE, distance_from, label_regions
 
 if TYPE_CHECKING:
+    from random import Random
+
     from engine import Engine
     from entity import Entity
 
@@ -22,7 +25,14 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+        # Insertion ordered set, so iterating entities is reproducible between runs.
+        self.entities: Dict[Entity, None] = {}
+        # Entities bucketed by the tile they stand on, for constant time lookups.
+        self.location_index: Dict[Tuple[int, int], List[Entity]] = {}
+        # The same entities as NumPy columns, for vectorized queries.
+        self.entity_table = EntityTable()
+        for entity in entities:
+            self.add_entity(entity)
         self.tiles = np.full((width, height), fill_value=tile_types.wall, order="F")
         self.visible = np.full(
             (width, height), fill_value=False, order="F"
@@ -31,6 +41,9 @@ class GameMap:
             (width, height), fill_value=False, order="F"
         )  # Tiles the player has seen before
         self.downstairs_location = (0, 0)
+        self.start_location = (0, 0)  # Where the player arrives on this map.
+        # Walking distance of every tile from start_location, once computed.
+        self.start_distance: Optional[np.ndarray] = None
 
     @property
     def gamemap(self) -> GameMap:
@@ -40,58 +53,160 @@ class GameMap:
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over the map's living actors."""
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        yield from self.entity_table.select(self.entity_table.living_actors())
 
     @property
     def items(self) -> Iterator[Item]:
         """Return all items in the game map."""
-        yield from (entity for entity in self.entities if isinstance(entity, Item))
+        yield from self.entity_table.select(
+            self.entity_table.columns["type_id"] == ITEM
+        )
+
+    def add_entity(self, entity: Entity) -> None:
+        """Add an entity to this map at its current location."""
+        self.entities[entity] = None
+        self.location_index.setdefault((entity.x, entity.y), []).append(entity)
+        self.entity_table.add(entity)
+
+    def remove_entity(self, entity: Entity) -> None:
+        """Remove an entity from this map."""
+        del self.entities[entity]
+        location = (entity.x, entity.y)
+        bucket = self.location_index[location]
+        bucket.remove(entity)
+        if not bucket:
+            del self.location_index[location]
+        self.entity_table.remove(entity)
+
+    def update_entity(self, entity: Entity) -> None:
+        """Bring the entity table up to date after an entity's state changed."""
+        self.entity_table.update(entity)
+
+    def relocate_entity(self, entity: Entity, x: int, y: int) -> None:
+        """Move an entity already on this map to a new location.
+
+        The entity keeps its place in the order entities are iterated in.
+        """
+        location = (entity.x, entity.y)
+        bucket = self.location_index[location]
+        bucket.remove(entity)
+        if not bucket:
+            del self.location_index[location]
+        entity.x = x
+        entity.y = y
+        self.location_index.setdefault((x, y), []).append(entity)
+        self.entity_table.move(entity)
+
+    def get_entities_at_location(self, x: int, y: int) -> List[Entity]:
+        """Returns all entities at a location."""
+        return self.location_index.get((x, y), [])
+
+    def get_items_at_location(self, x: int, y: int) -> Iterator[Item]:
+        """Iterate over the items at a location."""
+        yield from (
+            entity
+            for entity in self.get_entities_at_location(x, y)
+            if isinstance(entity, Item)
+        )
 
     def get_blocking_entity_at_location(self, x: int, y: int) -> Optional[Entity]:
         """Returns a blocking entity at a location."""
-        for entity in self.entities:
-            if entity.blocks_movement and entity.x == x and entity.y == y:
+        for entity in self.get_entities_at_location(x, y):
+            if entity.blocks_movement:
                 return entity
 
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
         """Returns an actor at a location."""
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
-                return actor
+        for entity in self.get_entities_at_location(x, y):
+            if isinstance(entity, Actor) and entity.is_alive:
+                return entity
 
         return None
 
-    def in_bounds(self, x: int, y: int) -> bool:
-        """Return True if x and y are inside of the bounds of this map."""
-        return 0 <= x < self.width and 0 <= y < self.height
+    def make_noise(self, x: int, y: int, radius: float) -> List[Actor]:
+        """Wake the living actors at most `radius` from a noise, and return them.
 
-    def render(self, console: Console) -> None:
+        Woken actors take their turns however far they are from the player,
+        for the next `ai.awake_turns` turns.
+        """
+        table = self.entity_table
+        heard = table.living_actors() & table.within_radius(x, y, radius)
+        awake_until = self.engine.turn_count + self.engine.config.ai["awake_turns"]
+        table.columns["awake_until"][heard] = awake_until
+        actors = table.select(heard)
+        for actor in actors:
+            actor.awake_until = awake_until
+        return actors
+
+    def get_visible_entities(self) -> List[Entity]:
+        """Returns the entities on tiles the player can currently see."""
+        table = self.entity_table
+        return table.select(table.on_tiles(self.visible))
+
+    def distance_from_start(self) -> np.ndarray:
+        """Return the walking distance of every tile from the start location.
+
+        Computed on first use and kept until the map's walkable tiles change, so
+        the AI and anything else measuring from the stairs can share it. Tiles
+        that can not be reached are map_analysis.UNREACHABLE.
         """
-        Renders the map.
+        if self.start_distance is None:
+            self.start_distance = distance_from(
+                self.tiles["walkable"], self.start_location
+            )
+        return self.start_distance
+
+    def analyze(self, rng: Random, stairs_percentile: Optional[float] = None) -> None:
+        """Check and finish a newly generated map.
+
+        Walls in every tile that can not be reached from the start location, and
+        if `stairs_percentile` is given, moves the down stairs to a tile at that
+        percentile of the walking distances from the start.
+        """
+        self.strip_unreachable()
+        if stairs_percentile is not None:
+            self.place_downstairs(stairs_percentile, rng)
+
+    def strip_unreachable(self) -> int:
+        """Turn walkable tiles cut off from the start location into walls.
 
-        If a tile is in the "visible" array, then draw it with the "light" colors.
-        If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
-        Otherwise, the default is "SHROUD".
+        Entities on those tiles are removed. Returns the number of tiles walled in.
         """
-        console.tiles_rgb[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=tile_types.SHROUD,
-        )
+        walkable = self.tiles["walkable"]
+        labels, _ = label_regions(walkable)
+        pockets = walkable & (labels != labels[self.start_location])
+        if not pockets.any():
+            return 0
+
+        self.tiles[pockets] = tile_types.wall
+        table = self.entity_table
+        for entity in table.select(table.on_tiles(pockets)):
+            self.remove_entity(entity)
+        self.start_distance = None
+        return int(np.count_nonzero(pockets))
+
+    def place_downstairs(self, percentile: float, rng: Random) -> None:
+        """Move the down stairs to a tile at a percentile of the distance from the start.
+
+        At 100 they go as far from the start as possible. Ties are broken with `rng`.
+        """
+        distance = self.distance_from_start()
+        reachable = distance < UNREACHABLE
+        reachable[self.start_location] = False
+        if not reachable.any():
+            return
 
-        entities_sorted_for_rendering = sorted(
-            self.entities, key=lambda x: x.render_order.value
-        )
+        target = np.percentile(distance[reachable], percentile, method="nearest")
+        xs, ys = np.nonzero(reachable & (distance == target))
+        index = rng.randrange(len(xs))
+
+        if self.downstairs_location != self.start_location:
+            self.tiles[self.downstairs_location] = tile_types.floor
+        self.downstairs_location = int(xs[index]), int(ys[index])
+        self.tiles[self.downstairs_location] = tile_types.down_stairs
 
-        for entity in entities_sorted_for_rendering:
-            # Only print entities that are in the FOV
-            if self.visible[entity.x, entity.y]:
-                console.print(
-                    x=entity.x, y=entity.y, string=entity.char, fg=entity.color
-                )
+    def in_bounds(self, x: int, y: int) -> bool:
+        """Return True if x and y are inside of the bounds of this map."""
+        return 0 <= x < self.width and 0 <= y < self.height
@@ -1,12 +1,19 @@
 """Holds GameMap settings and generates new maps when moving down the stairs."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple, TYPE_CHECKING
 
-from procgen import generate_dungeon
+from floor_store import FloorStore
+from map_generators import make_generator
 
 if TYPE_CHECKING:
     from engine import Engine
+    from game_map import GameMap
+
+# A single worker shared by every game builds upcoming floors in the background.
+pregenerator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pregenerate")
 
 
 class GameWorld:
@@ -22,9 +29,24 @@ class GameWorld:
         room_min_size: int,
         room_max_size: int,
         current_floor: int = 0,
+        seed: Optional[int] = None,
+        pregenerate: bool = True,
+        hot_floors: int = 3,
+        floor_cache_dir: str = "floor_cache",
+        run_id: Optional[str] = None,
+        generator: str = "rooms",
+        generator_options: Optional[Dict[str, Any]] = None,
+        stairs_percentile: Optional[float] = None,
     ):
         self.engine = engine
 
+        # Every random choice in the game is drawn from generators seeded from this,
+        # so a run can be replayed exactly from its seed.
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
         self.map_width = map_width
         self.map_height = map_height
 
@@ -33,18 +55,87 @@ class GameWorld:
         self.room_min_size = room_min_size
         self.room_max_size = room_max_size
 
+        # Floors are regenerated from their seed, so a run keeps its generator.
+        self.generator_name = generator
+        self.generator_options = generator_options or {}
+        self.generator = make_generator(
+            generator, max_rooms, room_min_size, room_max_size, generator_options
+        )
+        # Where the down stairs go among the tiles reachable from the up stairs,
+        # or None to leave them where the generator put them.
+        self.stairs_percentile = stairs_percentile
+
         self.current_floor = current_floor
+        # Every floor visited so far, so the player can go back up.
+        self.floors = FloorStore(engine, floor_cache_dir, hot_floors, run_id)
 
-    def generate_floor(self) -> None:
-        """Generate dungeon floor"""
+        # Build the next floor while this one is played, so descending is instant.
+        self.pregenerate = pregenerate
+        self.next_floor: Optional[Tuple[int, Future[GameMap]]] = None
+
+    def floor_rng(self, floor: int) -> random.Random:
+        """Return a generator for building the given floor.
 
-        self.current_floor += 1
+        Each floor is seeded independently from the world seed, so floors do not
+        share random state and generate the same no matter when they are built.
+        """
+        return random.Random(f"{self.seed}:{floor}")
 
-        self.engine.game_map = generate_dungeon(
-            max_rooms=self.max_rooms,
-            room_min_size=self.room_min_size,
-            room_max_size=self.room_max_size,
+    def build_floor(self, floor: int) -> GameMap:
+        """Build the map of the given floor. Safe to call from any thread."""
+        rng = self.floor_rng(floor)
+        game_map = self.generator.generate(
             map_width=self.map_width,
             map_height=self.map_height,
             engine=self.engine,
+            floor_number=floor,
+            rng=rng,
         )
+        game_map.analyze(rng, self.stairs_percentile)
+        return game_map
+
+    def prepare_next_floor(self) -> None:
+        """Start building the floor below the current one in the background."""
+        floor = self.current_floor + 1
+        if floor in self.floors:
+            return
+        if self.pregenerate and (
+            self.next_floor is None or self.next_floor[0] != floor
+        ):
+            self.next_floor = (floor, pregenerator.submit(self.build_floor, floor))
+
+    def generate_floor(self) -> None:
+        """Move down to the next dungeon floor, arriving at its up stairs."""
+        self.enter_floor(self.current_floor + 1)
+
+    def ascend_floor(self) -> None:
+        """Move up to the previous dungeon floor, arriving at its down stairs."""
+        self.enter_floor(self.current_floor - 1, at_downstairs=True)
+
+    def enter_floor(self, floor: int, at_downstairs: bool = False) -> None:
+        """Make `floor` the current floor and move the player onto it.
+
+        A floor visited before is taken from the floor store. A new floor is taken
+        from the background worker if it has been prepared, waiting for it to
+        finish if needed, and built right away otherwise. Both give the same floor,
+        as it is generated from its own seed.
+        """
+        game_map = self.floors.get(floor)
+        if game_map is None:
+            if self.next_floor is not None and self.next_floor[0] == floor:
+                game_map = self.next_floor[1].result()
+                self.next_floor = None
+            else:
+                game_map = self.build_floor(floor)
+
+        if at_downstairs:
+            location = game_map.downstairs_location
+        else:
+            location = game_map.start_location
+        # Moved first, so the floor being left is stored without the player.
+        self.engine.player.place(*location, gamemap=game_map)
+
+        self.current_floor = floor
+        self.engine.game_map = game_map
+        self.floors.put(floor, game_map)
+        self.prepare_next_floor()
@@ -0,0 +1,160 @@
+"""Play game sessions without a window, for benchmarks and automated runs."""
+from __future__ import annotations
+
+import itertools
+import random
+import time
+from typing import Callable, Dict, Iterable, Optional, TYPE_CHECKING
+
+import tcod
+
+import actions
+import exceptions
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+Policy = Callable[["Engine"], Optional[actions.Action]]
+"""Picks the next player action for an engine, or None to stop playing."""
+
+PHASES = ("actions", "npc_turns", "fov", "render")
+
+DIRECTIONS = [
+    (-1, -1),
+    (0, -1),
+    (1, -1),
+    (-1, 0),
+    (1, 0),
+    (-1, 1),
+    (0, 1),
+    (1, 1),
+]
+
+SCRIPT_COMMANDS = {
+    "n": (0, -1),
+    "s": (0, 1),
+    "w": (-1, 0),
+    "e": (1, 0),
+    "nw": (-1, -1),
+    "ne": (1, -1),
+    "sw": (-1, 1),
+    "se": (1, 1),
+}
+
+
+def random_policy(rng: random.Random) -> Policy:
+    """Return a policy that wanders randomly but fights, heals, loots and descends."""
+
+    def policy(engine: Engine) -> Optional[actions.Action]:
+        player = engine.player
+        game_map = engine.game_map
+
+        if (player.x, player.y) == game_map.downstairs_location:
+            return actions.TakeStairsAction(player)
+        if any(game_map.get_items_at_location(player.x, player.y)):
+            if len(player.inventory.items) < player.inventory.capacity:
+                return actions.PickupAction(player)
+
+        if player.fighter.hp * 2 < player.fighter.max_hp:
+            for item in player.inventory.items:
+                if item.name == "Health Potion":
+                    return actions.ItemAction(player, item)
+
+        for dx, dy in DIRECTIONS:
+            if game_map.get_actor_at_location(player.x + dx, player.y + dy):
+                return actions.MeleeAction(player, dx, dy)
+
+        return actions.BumpAction(player, *rng.choice(DIRECTIONS))
+
+    return policy
+
+
+def scripted_policy(commands: Iterable[str], repeat: bool = True) -> Policy:
+    """Return a policy that plays a fixed list of commands.
+
+    Commands are compass directions (`n`, `se`, ...), `wait`, `pickup` or `stairs`.
+    """
+    script = list(commands)
+    steps = itertools.cycle(script) if repeat else iter(script)
+
+    def policy(engine: Engine) -> Optional[actions.Action]:
+        player = engine.player
+        command = next(steps, None)
+        if command is None:
+            return None
+        if command in SCRIPT_COMMANDS:
+            return actions.BumpAction(player, *SCRIPT_COMMANDS[command])
+        if command == "wait":
+            return actions.WaitAction(player)
+        if command == "pickup":
+            return actions.PickupAction(player)
+        if command == "stairs":
+            return actions.TakeStairsAction(player)
+        raise ValueError(f"Unknown script command: {command!r}")
+
+    return policy
+
+
+class HeadlessSession:
+    """Drive an Engine turn by turn, rendering onto an offscreen console."""
+
+    def __init__(self, engine: Engine, policy: Policy, render: bool = True):
+        self.engine = engine
+        self.policy = policy
+        self.render = render
+        self.console = tcod.Console(*engine.config.screen_size, order="F")
+        self.turns = 0
+        self.failed_actions = 0
+        self.timings: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+
+    def play_turn(self) -> bool:
+        """Play one player action, and the world's response if it took a turn.
+
+        Mirrors `EventHandler.handle_action`, timing each phase separately.
+        Returns False once the session is over.
+        """
+        engine = self.engine
+        if not engine.player.is_alive:
+            return False
+        action = self.policy(engine)
+        if action is None:
+            return False
+
+        start = time.perf_counter()
+        try:
+            action.perform()
+        except exceptions.ActionCannotBePerformed:
+            self.failed_actions += 1
+            return True
+        finally:
+            self.timings["actions"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.handle_npc_turns()
+        self.timings["npc_turns"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine.update_fov()
+        self.timings["fov"] += time.perf_counter() - start
+
+        if engine.player.level.requires_level_up:
+            engine.player.level.increase_max_hp()
+
+        if self.render:
+            start = time.perf_counter()
+            self.console.clear()
+            engine.render(self.console)
+            self.timings["render"] += time.perf_counter() - start
+
+        self.turns += 1
+        return True
+
+    def run(self, turns: int) -> int:
+        """Play until `turns` turns have passed or the session ends.
+
+        Returns the number of turns played.
+        """
+        while self.turns < turns and self.play_turn():
+            if self.failed_actions > turns * 10:
+                break  # Give up on policies that only pick impossible actions.
+        return self.turns
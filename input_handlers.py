@@ -2,20 +2,26 @@
 from __future__ import annotations
 
 import os
-from typing import Callable, Optional, Tuple, TYPE_CHECKING, Union
+from typing import Callable, Dict, Optional, Tuple, TYPE_CHECKING, Union
 
+import numpy as np  # type: ignore
 import tcod.context
 import tcod.event
 
 import actions
 import color
 import exceptions
+import render_functions
+import targeting
 from actions import Action
+from profiling import profiler
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Item
 
+Index = Tuple[np.ndarray, np.ndarray]  # x and y indices of map tiles
+
 MOVE_KEYS = {
     # Arrow keys.
     tcod.event.K_UP: (0, -1),
@@ -141,18 +147,23 @@ class EventHandler(BaseEventHandler):
         """
         if action is None:
             return False
+        if self.engine.journal is not None:
+            self.engine.journal.record_action(action)
 
         try:
-            action.perform()
+            with profiler.phase("action"):
+                action.perform()
         except exceptions.ActionCannotBePerformed as exc:
             self.engine.message_log.add_message(
                 exc.args[0], color.action_cannot_be_performed
             )
             return False  # Skip enemy turn on exceptions.
 
-        self.engine.handle_npc_turns()
+        with profiler.phase("npc_turns"):
+            self.engine.handle_npc_turns()
 
-        self.engine.update_fov()
+        with profiler.phase("fov"):
+            self.engine.update_fov()
         return True
 
     def ev_mousemotion(self, event: tcod.event.MouseMotion) -> None:
@@ -161,8 +172,10 @@ class EventHandler(BaseEventHandler):
             self.engine.mouse_location = event.position
 
     def on_render(self, console: tcod.Console) -> None:
-        """Have the engine render."""
+        """Have the engine render, with the profiler overlay if it is on."""
         self.engine.render(console)
+        if profiler.enabled:
+            profiler.render(console, x=console.width - 40, y=0, width=40)
 
 
 class AskUserEventHandler(EventHandler):
@@ -295,6 +308,8 @@ class LevelUpEventHandler(AskUserEventHandler):
         index = key - tcod.event.K_a
 
         if 0 <= index <= 2:
+            if self.engine.journal is not None:
+                self.engine.journal.record_level_up(index)
             if index == 0:
                 player.level.increase_max_hp()
             elif index == 1:
@@ -417,21 +432,81 @@ class InventoryDropHandler(InventoryEventHandler):
 
 
 class SelectIndexHandler(AskUserEventHandler):
-    """Handles asking the user for an index on the map."""
+    """Handles asking the user for an index on the map.
+
+    Nothing in the game changes while an index is being picked, so the frame is
+    rendered once, when the first one is drawn, and kept as a background. Moving
+    the cursor then only redraws what follows it: the names under it, the
+    cursor itself and whatever `render_target` draws.
+    """
 
     def __init__(self, engine: Engine):
         """Sets the cursor to the player when this handler is constructed."""
         super().__init__(engine)
         player = self.engine.player
         engine.mouse_location = player.x, player.y
+        self.background: Optional[tcod.Console] = None
+        # Width of the names under the cursor on the background, to erase them.
+        self.background_names_width = 0
 
     def on_render(self, console: tcod.Console) -> None:
-        """Highlight the tile under the cursor."""
-        super().on_render(console)
+        """Draw the cursor and what it targets over the background."""
+        background = self.background
+        if (
+            background is None
+            or background.width != console.width
+            or background.height != console.height
+        ):
+            background = tcod.Console(console.width, console.height, order="F")
+            super().on_render(background)
+            self.background = background
+            self.background_names_width = len(
+                ", ".join(
+                    render_functions.get_names_at_location(
+                        *self.engine.mouse_location, game_map=self.engine.game_map
+                    )
+                )
+            )
+        background.blit(console)
+        self.render_overlay(console)
+
+    def handle_action(self, action: Optional[Action]) -> bool:
+        """Handle an action, drawing the background again if it failed.
+
+        A failed action leaves this handler in place, with its reason added to
+        the message log, which the old background would not show.
+        """
+        if action is None:
+            return False
+        self.background = None
+        self.background_names_width = 0
+        return super().handle_action(action)
+
+    def render_overlay(self, console: tcod.Console) -> None:
+        """Draw the names under the cursor, what it targets and the cursor."""
+        examine_x, examine_y = self.engine.config.examine_ui_location
+        if self.background_names_width:
+            console.draw_rect(
+                examine_x,
+                examine_y,
+                self.background_names_width,
+                1,
+                ch=ord(" "),
+                fg=color.white,
+                bg=color.black,
+            )
+        render_functions.render_names_at_mouse_location(
+            console=console, x=examine_x, y=examine_y, engine=self.engine
+        )
+
         x, y = self.engine.mouse_location
+        self.render_target(console, x, y)
         console.tiles_rgb["bg"][x, y] = color.white
         console.tiles_rgb["fg"][x, y] = color.black
 
+    def render_target(self, console: tcod.Console, x: int, y: int) -> None:
+        """Draw what selecting (x, y) would affect, over the background."""
+
     def ev_keydown(self, event: tcod.event.KeyDown) -> Optional[ActionOrHandler]:
         """Check for key movement or confirmation keys."""
         key = event.sym
@@ -512,22 +587,33 @@ class AreaRangedAttackHandler(SelectIndexHandler):
 
         self.radius = radius
         self.callback = callback
+        # For each target drawn, the tiles its blast reaches and the tiles of the
+        # visible actors it would hit, as index arrays. They stay valid for as
+        # long as the handler, since nothing moves while the player aims.
+        self.blasts: Dict[Tuple[int, int], Tuple[Index, Index]] = {}
+
+    def render_target(self, console: tcod.Console, x: int, y: int) -> None:
+        """Tint the tiles the blast would reach, and the actors it would hit."""
+        if (x, y) not in self.blasts:
+            game_map = self.engine.game_map
+            blast = targeting.blast_mask(
+                game_map.tiles["transparent"], x, y, self.radius
+            )
+            hits = targeting.actors_in_area(game_map, blast & game_map.visible)
+            self.blasts[x, y] = (
+                np.nonzero(blast),
+                (
+                    np.array([actor.x for actor in hits], dtype=np.intp),
+                    np.array([actor.y for actor in hits], dtype=np.intp),
+                ),
+            )
+        area, hits = self.blasts[x, y]
 
-    def on_render(self, console: tcod.Console) -> None:
-        """Highlight the tile under the cursor."""
-        super().on_render(console)
-
-        x, y = self.engine.mouse_location
-
-        # Draw a rectangle around the targeted area, so the player can see the affected tiles.
-        console.draw_frame(
-            x=x - self.radius - 1,
-            y=y - self.radius - 1,
-            width=self.radius**2,
-            height=self.radius**2,
-            fg=color.red,
-            clear=False,
-        )
+        tiles = console.tiles_rgb
+        bg = tiles["bg"]
+        bg[area] = bg[area] // 2 + np.array(color.targeting_area) // 2
+        bg[hits] = color.targeting_hit
+        tiles["fg"][hits] = color.black
 
     def on_index_selected(self, x: int, y: int) -> Optional[Action]:
         """Call callback on selected index."""
@@ -545,9 +631,10 @@ class MainGameEventHandler(EventHandler):
         modifier = event.mod
         player = self.engine.player
 
-        if key == tcod.event.K_PERIOD and modifier & (
+        if key in (tcod.event.K_PERIOD, tcod.event.K_COMMA) and modifier & (
             tcod.event.KMOD_LSHIFT | tcod.event.KMOD_RSHIFT
         ):
+            # '>' and '<' both take whichever stairs the player is standing on.
             return actions.TakeStairsAction(player)
 
         if key in MOVE_KEYS:
@@ -571,6 +658,15 @@ class MainGameEventHandler(EventHandler):
         elif key == tcod.event.K_SLASH:
             return LookHandler(self.engine)
 
+        elif key == tcod.event.K_F3:
+            profiler.toggle()
+        elif key == tcod.event.K_F4:
+            filename = str(self.engine.config.paths["profile_trace"])
+            events = profiler.export_trace(filename)
+            self.engine.message_log.add_message(
+                f"Wrote {events} profiler events to {filename}."
+            )
+
         elif key == tcod.event.K_ESCAPE:
             raise SystemExit()
 
@@ -585,6 +681,8 @@ class GameOverEventHandler(EventHandler):
         """Handle exiting out of a finished game."""
         if os.path.exists("savegame.sav"):
             os.remove("savegame.sav")  # Deletes the active save file.
+        self.engine.game_world.floors.clear()  # And the floors it refers to.
+        self.engine.close()
         raise exceptions.QuitWithoutSaving()  # Avoid saving a finished game.
 
     def ev_quit(self, event: tcod.event.Quit) -> None:
@@ -610,7 +708,7 @@ class HistoryViewer(EventHandler):
 
     def __init__(self, engine: Engine):
         super().__init__(engine)
-        self.log_length = len(engine.message_log.messages)
+        self.log_length = len(engine.message_log)
         self.cursor = self.log_length - 1
 
     def on_render(self, console: tcod.Console) -> None:
@@ -632,7 +730,7 @@ class HistoryViewer(EventHandler):
             1,
             log_console.width - 2,
             log_console.height - 2,
-            self.engine.message_log.messages[: self.cursor + 1],
+            self.engine.message_log.history(self.cursor + 1),
         )
         log_console.blit(console, 3, 3)
 
@@ -3,11 +3,14 @@ import traceback
 
 import tcod
 
+import assets
+import autosave
 import color
 import exceptions
 import input_handlers
 import setup_game
-from config import Config
+from config import Config, get_config
+from profiling import profiler
 
 
 def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
@@ -17,14 +20,39 @@ def save_game(handler: input_handlers.BaseEventHandler, filename: str) -> None:
         print("Game saved.")
 
 
-def main() -> None:
-    config = Config()
+def close_engine(handler: input_handlers.BaseEventHandler) -> None:
+    """If the current event handler has an active Engine then close its files."""
+    if isinstance(handler, input_handlers.EventHandler):
+        handler.engine.close()
+
 
-    tileset = tcod.tileset.load_tilesheet(
-        config.paths["tileset"], 32, 8, tcod.tileset.CHARMAP_TCOD
+def apply_config(config: Config, autosaver: autosave.Autosaver) -> None:
+    """Bring the settings taken from the config at startup up to date with it.
+
+    Whether the profiler is enabled is left as it is, since F3 toggles it.
+    """
+    profiler.configure(
+        history=config.profiler["history"],
+        trace_events=config.profiler["trace_events"],
     )
+    autosaver.every_n_turns = config.save["autosave"]["every_n_turns"]
+    autosaver.on_floor_change = config.save["autosave"]["on_floor_change"]
+    autosaver.compression_level = config.save["compression_level"]
+
+
+def main() -> None:
+    config = get_config()
+    profiler.configure(**config.profiler)
+
+    tileset = assets.load_tileset(config.relative_paths["tileset"], 32, 8)
 
     handler: input_handlers.BaseEventHandler = setup_game.MainMenu()
+    autosaver = autosave.Autosaver(
+        "savegame.sav",
+        every_n_turns=config.save["autosave"]["every_n_turns"],
+        on_floor_change=config.save["autosave"]["on_floor_change"],
+        compression_level=config.save["compression_level"],
+    )
 
     with tcod.context.new_terminal(
         config.view["screen"]["width"],
@@ -42,14 +70,24 @@ def main() -> None:
 
         try:
             while True:
-                root_console.clear()
-                handler.on_render(console=root_console)
-                context.present(root_console)
+                with profiler.phase("render"):
+                    root_console.clear()
+                    handler.on_render(console=root_console)
+                with profiler.phase("present"):
+                    context.present(root_console)
 
                 try:
-                    for event in tcod.event.wait():
+                    if config.hot_reload and config.reload_if_changed():
+                        apply_config(config, autosaver)
+                        if isinstance(handler, input_handlers.EventHandler):
+                            handler.engine.message_log.add_message(
+                                "Reloaded config.yml."
+                            )
+                    # Wake up regularly to check for changes while hot reloading.
+                    for event in tcod.event.wait(0.5 if config.hot_reload else None):
                         event = context.convert_event(event)
-                        handler = handler.handle_event(event)
+                        with profiler.phase("event"):
+                            handler = handler.handle_event(event)
                 except Exception:  # Handle exceptions in game.
                     traceback.print_exc()  # Print error to stderr.
                     # Then print the error to the message log.
@@ -57,13 +95,22 @@ def main() -> None:
                         handler.engine.message_log.add_message(
                             traceback.format_exc(), color.error
                         )
+
+                if isinstance(handler, input_handlers.EventHandler):
+                    autosaver.update(handler.engine)
         except exceptions.QuitWithoutSaving:
+            autosaver.close()
+            close_engine(handler)
             raise
         except SystemExit:  # Save and quit.
+            autosaver.close()
             save_game(handler, "savegame.sav")
+            close_engine(handler)
             raise
         except BaseException:  # Save on any other unexpected exception.
+            autosaver.close()
             save_game(handler, "savegame.sav")
+            close_engine(handler)
             raise
 
 
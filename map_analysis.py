@@ -0,0 +1,77 @@
+"""Whole-map queries over tile arrays, used to check and finish generated floors."""
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np  # type: ignore
+import tcod
+
+# Distance given to tiles that can not be reached by tcod.path.dijkstra2d.
+UNREACHABLE = np.iinfo(np.int32).max
+
+# Offsets to the neighbours after a tile, which with the ones before it (found
+# from their side) make up all 8 neighbours.
+FORWARD_NEIGHBOURS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+def distance_from(walkable: np.ndarray, start: Tuple[int, int]) -> np.ndarray:
+    """Return the walking distance of every tile from `start`.
+
+    Steps cost 2 straight and 3 diagonally. Tiles that can not be reached are
+    UNREACHABLE.
+    """
+    cost = walkable.astype(np.int8)
+    distance = tcod.path.maxarray(cost.shape, dtype=np.int32, order="F")
+    distance[start] = 0
+    tcod.path.dijkstra2d(distance, cost, 2, 3, out=distance)
+    return distance
+
+
+def label_regions(walkable: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Label the regions of walkable tiles that are connected, diagonals included.
+
+    Returns an array holding the region number of every tile, counting from 1,
+    or 0 for tiles that are not walkable, and the number of regions.
+
+    Every tile starts as a region of its own. Each round, every region is merged
+    into the lowest numbered region next to it, and then each tile looks up the
+    region its region was merged into until none change, all with whole-array
+    operations. Rounds go on until no neighbouring tiles are in different regions.
+    """
+    width, height = walkable.shape
+    index = np.arange(walkable.size, dtype=np.int64).reshape(walkable.shape)
+
+    # Every pair of neighbouring walkable tiles, by their index.
+    firsts = []
+    seconds = []
+    for dx, dy in FORWARD_NEIGHBOURS:
+        first = (slice(0, width - dx), slice(max(0, -dy), height - max(0, dy)))
+        second = (slice(dx, width), slice(max(0, dy), height - max(0, -dy)))
+        both = walkable[first] & walkable[second]
+        firsts.append(index[first][both])
+        seconds.append(index[second][both])
+    a = np.concatenate(firsts)
+    b = np.concatenate(seconds)
+
+    region = index.ravel()
+    while True:
+        region_a = region[a]
+        region_b = region[b]
+        differ = region_a != region_b
+        if not differ.any():
+            break
+        low = np.minimum(region_a[differ], region_b[differ])
+        high = np.maximum(region_a[differ], region_b[differ])
+        np.minimum.at(region, high, low)
+        while True:
+            merged = region[region]
+            if np.array_equal(merged, region):
+                break
+            region = merged
+
+    labels = np.zeros(walkable.shape, dtype=np.int32)
+    roots, numbers = np.unique(
+        region.reshape(walkable.shape)[walkable], return_inverse=True
+    )
+    labels[walkable] = numbers.ravel() + 1
+    return labels, len(roots)
@@ -0,0 +1,390 @@
+"""Interchangeable algorithms for laying out dungeon floors.
+
+The generator used by a game is picked by name from GENERATORS, with the
+`procgen.generator` setting in config.yml. Every generator takes the room
+settings of the GameWorld, plus its own options from `procgen.generators`.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple, Type, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import tile_types
+from game_map import GameMap
+from map_analysis import UNREACHABLE, distance_from, label_regions
+from procgen import (
+    RectangularRoom,
+    generate_dungeon,
+    place_entities,
+    spawn_entities,
+    tunnel_slices,
+)
+
+if TYPE_CHECKING:
+    from random import Random
+
+    from engine import Engine
+
+
+class MapGenerator:
+    """Builds the map of a new dungeon floor."""
+
+    def __init__(self, max_rooms: int, room_min_size: int, room_max_size: int):
+        self.max_rooms = max_rooms
+        self.room_min_size = room_min_size
+        self.room_max_size = room_max_size
+
+    @property
+    def area_size(self) -> int:
+        """The size of the areas a map without rooms is populated in, per room."""
+        return 2 * self.room_max_size
+
+    def generate(
+        self,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        floor_number: int,
+        rng: Random,
+    ) -> GameMap:
+        """Return a new map, drawing every random choice from `rng`.
+
+        Only the new map may be modified, so floors can be built on another
+        thread. The player is not placed; they arrive at the `start_location`.
+
+        This method must be overridden by MapGenerator subclasses.
+        """
+        raise NotImplementedError()
+
+
+class RoomsGenerator(MapGenerator):
+    """Random non-overlapping rectangular rooms, each joined to the one before."""
+
+    def generate(
+        self,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        floor_number: int,
+        rng: Random,
+    ) -> GameMap:
+        """Generate the floor with procgen.generate_dungeon."""
+        return generate_dungeon(
+            max_rooms=self.max_rooms,
+            room_min_size=self.room_min_size,
+            room_max_size=self.room_max_size,
+            map_width=map_width,
+            map_height=map_height,
+            engine=engine,
+            floor_number=floor_number,
+            rng=rng,
+        )
+
+
+class BSPGenerator(MapGenerator):
+    """Rooms in the leaves of a binary space partition, joined along the tree.
+
+    The map is split in two again and again, until the parts are too small to
+    split or `depth` splits have been made. Each part gets a room, and the rooms
+    on both sides of every split are joined by a tunnel, so every room is reached.
+    """
+
+    def __init__(
+        self,
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        depth: int = 8,
+        min_leaf_size: Optional[int] = None,
+    ):
+        super().__init__(max_rooms, room_min_size, room_max_size)
+        self.depth = depth
+        # By default leaves fit the largest room, and they must fit the smallest.
+        self.min_leaf_size = max(min_leaf_size or room_max_size + 2, room_min_size + 2)
+
+    def generate(
+        self,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        floor_number: int,
+        rng: Random,
+    ) -> GameMap:
+        """Partition the map, dig a room per leaf and join them."""
+        dungeon = GameMap(engine, map_width, map_height)
+        dug = np.zeros((map_width, map_height), dtype=bool, order="F")
+
+        rooms = self.split(0, 0, map_width, map_height, self.depth, dug, rng)
+
+        dungeon.start_location = rooms[0].center
+        for room in rooms:
+            place_entities(room, dungeon, floor_number, rng)
+
+        finish_floor(dungeon, dug, rooms[-1].center, floor_number)
+        return dungeon
+
+    def split(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        height: int,
+        depth: int,
+        dug: np.ndarray,
+        rng: Random,
+    ) -> List[RectangularRoom]:
+        """Dig the rooms of a part of the map, returning them in tree order."""
+        can_split_x = width >= 2 * self.min_leaf_size
+        can_split_y = height >= 2 * self.min_leaf_size
+        if depth == 0 or not (can_split_x or can_split_y):
+            return [self.dig_room(x, y, width, height, dug, rng)]
+
+        # Split across the longer side, so parts do not become long and thin.
+        if can_split_x and can_split_y:
+            vertical = width > height if width != height else rng.random() < 0.5
+        else:
+            vertical = can_split_x
+        if vertical:
+            cut = rng.randint(self.min_leaf_size, width - self.min_leaf_size)
+            first = self.split(x, y, cut, height, depth - 1, dug, rng)
+            second = self.split(x + cut, y, width - cut, height, depth - 1, dug, rng)
+        else:
+            cut = rng.randint(self.min_leaf_size, height - self.min_leaf_size)
+            first = self.split(x, y, width, cut, depth - 1, dug, rng)
+            second = self.split(x, y + cut, width, height - cut, depth - 1, dug, rng)
+
+        # Join the two halves, between the last room of one and the first of the other.
+        for index in tunnel_slices(first[-1].center, second[0].center, rng):
+            dug[index] = True
+        return first + second
+
+    def dig_room(
+        self, x: int, y: int, width: int, height: int, dug: np.ndarray, rng: Random
+    ) -> RectangularRoom:
+        """Mark a randomly sized room inside a leaf to be dug out."""
+        # RectangularRoom covers one more tile than its size, for the far walls.
+        room_width = rng.randint(self.room_min_size, min(self.room_max_size, width - 1))
+        room_height = rng.randint(
+            self.room_min_size, min(self.room_max_size, height - 1)
+        )
+        room = RectangularRoom(
+            rng.randint(x, x + width - 1 - room_width),
+            rng.randint(y, y + height - 1 - room_height),
+            room_width,
+            room_height,
+        )
+        dug[room.inner] = True
+        return room
+
+
+class CaveGenerator(MapGenerator):
+    """Natural caves grown by a cellular automaton.
+
+    The map starts as random noise with `fill` of it wall. Each step, a tile
+    becomes wall if at least 5 of its 8 neighbours are walls, and stays wall if at
+    least 4 are. Neighbours are counted for the whole map at once by summing
+    shifted copies of it. Only the largest cave is kept.
+    """
+
+    def __init__(
+        self,
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        fill: float = 0.45,
+        iterations: int = 4,
+    ):
+        super().__init__(max_rooms, room_min_size, room_max_size)
+        self.fill = fill
+        self.iterations = iterations
+
+    def generate(
+        self,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        floor_number: int,
+        rng: Random,
+    ) -> GameMap:
+        """Grow the caves, keep the largest one and populate it."""
+        dungeon = GameMap(engine, map_width, map_height)
+        noise = np.random.default_rng(rng.getrandbits(64))
+
+        walls = noise.random((map_width, map_height)) < self.fill
+        for _ in range(self.iterations):
+            seal_edges(walls)
+            neighbours = count_neighbours(walls)
+            walls = (neighbours >= 5) | (walls & (neighbours >= 4))
+        seal_edges(walls)
+
+        start, distance = largest_region(~walls, rng)
+        dungeon.start_location = start
+        dungeon.start_distance = distance
+        populate(dungeon, distance < UNREACHABLE, floor_number, rng, self.area_size)
+        finish_floor(dungeon, distance < UNREACHABLE, farthest(distance), floor_number)
+        return dungeon
+
+
+class DrunkardGenerator(MapGenerator):
+    """Winding tunnels dug by a random walk from the middle of the map.
+
+    The walker takes random steps until `floor_fraction` of the map is dug. Steps
+    are drawn and applied in batches with NumPy; a walker pushed against the edge
+    of the map slides along it, so everything it digs stays connected.
+    """
+
+    def __init__(
+        self,
+        max_rooms: int,
+        room_min_size: int,
+        room_max_size: int,
+        floor_fraction: float = 0.4,
+    ):
+        super().__init__(max_rooms, room_min_size, room_max_size)
+        self.floor_fraction = floor_fraction
+
+    def generate(
+        self,
+        map_width: int,
+        map_height: int,
+        engine: Engine,
+        floor_number: int,
+        rng: Random,
+    ) -> GameMap:
+        """Walk until enough of the map is dug out, then populate it."""
+        dungeon = GameMap(engine, map_width, map_height)
+        noise = np.random.default_rng(rng.getrandbits(64))
+        steps = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)], dtype=np.int32)
+
+        dug = np.zeros((map_width, map_height), dtype=bool, order="F")
+        x, y = map_width // 2, map_height // 2
+        dug[x, y] = True
+        target = int(self.floor_fraction * (map_width - 2) * (map_height - 2))
+        while np.count_nonzero(dug) < target:
+            walk = steps[noise.integers(len(steps), size=max(target, 64))]
+            xs = np.clip(x + np.cumsum(walk[:, 0]), 1, map_width - 2)
+            ys = np.clip(y + np.cumsum(walk[:, 1]), 1, map_height - 2)
+            dug[xs, ys] = True
+            x, y = int(xs[-1]), int(ys[-1])
+
+        dungeon.start_location = map_width // 2, map_height // 2
+        distance = dungeon.start_distance = distance_from(dug, dungeon.start_location)
+        populate(dungeon, dug, floor_number, rng, self.area_size)
+        finish_floor(dungeon, dug, farthest(distance), floor_number)
+        return dungeon
+
+
+def seal_edges(walls: np.ndarray) -> None:
+    """Turn the outermost tiles of a wall mask into walls."""
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+
+
+def count_neighbours(mask: np.ndarray) -> np.ndarray:
+    """Return how many of the 8 neighbours of every tile are True.
+
+    Tiles beyond the edge count as True.
+    """
+    padded = np.pad(mask, 1, constant_values=True).astype(np.int8)
+    width, height = mask.shape
+    counts = np.zeros(mask.shape, dtype=np.int8)
+    for dx in (0, 1, 2):
+        for dy in (0, 1, 2):
+            if dx != 1 or dy != 1:
+                counts += padded[dx : dx + width, dy : dy + height]
+    return counts
+
+
+def largest_region(
+    walkable: np.ndarray, rng: Random
+) -> Tuple[Tuple[int, int], np.ndarray]:
+    """Find the largest connected region of walkable tiles.
+
+    Returns a random tile of the region, and the distance from it to every tile.
+    """
+    labels, count = label_regions(walkable)
+    if count == 0:  # Nothing is walkable, so dig out a tile in the middle.
+        walkable = np.zeros(walkable.shape, dtype=bool)
+        walkable[walkable.shape[0] // 2, walkable.shape[1] // 2] = True
+        labels, count = label_regions(walkable)
+
+    largest = int(np.argmax(np.bincount(labels[walkable])))
+    xs, ys = np.nonzero(labels == largest)
+    index = rng.randrange(len(xs))
+    start = int(xs[index]), int(ys[index])
+    return start, distance_from(walkable, start)
+
+
+def farthest(distance: np.ndarray) -> Tuple[int, int]:
+    """Return the reachable tile farthest from the root of a distance map."""
+    reachable_distance = np.where(distance < UNREACHABLE, distance, -1)
+    x, y = np.unravel_index(np.argmax(reachable_distance), distance.shape)
+    return int(x), int(y)
+
+
+def populate(
+    dungeon: GameMap,
+    floor: np.ndarray,
+    floor_number: int,
+    rng: Random,
+    area_size: int,
+) -> None:
+    """Spawn monsters and items on a map without rooms.
+
+    The map is divided into squares of `area_size`, and every square with enough
+    floor in it is populated like one room.
+    """
+    for area_x in range(0, dungeon.width, area_size):
+        for area_y in range(0, dungeon.height, area_size):
+            xs, ys = np.nonzero(
+                floor[area_x : area_x + area_size, area_y : area_y + area_size]
+            )
+            if len(xs) < area_size:
+                continue
+
+            def random_location() -> Tuple[int, int]:
+                index = rng.randrange(len(xs))
+                return area_x + int(xs[index]), area_y + int(ys[index])
+
+            spawn_entities(dungeon, floor_number, rng, random_location)
+
+
+def finish_floor(
+    dungeon: GameMap,
+    floor: np.ndarray,
+    downstairs_location: Tuple[int, int],
+    floor_number: int,
+) -> None:
+    """Dig out the floor tiles of a map and put in its stairs."""
+    dungeon.tiles[floor] = tile_types.floor
+    if floor_number > 1:
+        dungeon.tiles[dungeon.start_location] = tile_types.up_stairs
+    dungeon.tiles[downstairs_location] = tile_types.down_stairs
+    dungeon.downstairs_location = downstairs_location
+
+
+GENERATORS: Dict[str, Type[MapGenerator]] = {
+    "rooms": RoomsGenerator,
+    "bsp": BSPGenerator,
+    "caves": CaveGenerator,
+    "drunkard": DrunkardGenerator,
+}
+"""Map generators by the name they are chosen with in config.yml."""
+
+
+def make_generator(
+    name: str,
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    options: Optional[Dict[str, Any]] = None,
+) -> MapGenerator:
+    """Return the generator registered under `name`, set up with `options`."""
+    try:
+        generator_class = GENERATORS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown map generator {name!r}, expected one of {', '.join(GENERATORS)}."
+        ) from None
+    return generator_class(max_rooms, room_min_size, room_max_size, **(options or {}))
@@ -1,11 +1,19 @@
 """Class that holds logic for rendering the message log."""
-from typing import Iterable, List, Reversible, Tuple
+from collections import deque
+import itertools
+import json
+import os
+import struct
+from typing import Deque, Iterable, Iterator, List, Optional, Reversible, Tuple
 import textwrap
 
 import tcod
 
 import color
 
+# Archive index entries: the end offset of each record in the archive's data file.
+OFFSET = struct.Struct("<Q")
+
 
 class Message:
     """A class representing a console message."""
@@ -14,6 +22,8 @@ class Message:
         self.plain_text = text
         self.fg = fg
         self.count = 1
+        # The width, count and wrapped lines of the last call to `wrapped`.
+        self.wrap_cache: Optional[Tuple[int, int, List[str]]] = None
 
     @property
     def full_text(self) -> str:
@@ -22,12 +32,114 @@ class Message:
             return f"{self.plain_text} (x{self.count})"
         return self.plain_text
 
+    def wrapped(self, width: int) -> List[str]:
+        """Return the full text wrapped to `width`, reusing the last result."""
+        if self.wrap_cache is None or self.wrap_cache[:2] != (width, self.count):
+            lines = list(MessageLog.wrap(self.full_text, width))
+            self.wrap_cache = (width, self.count, lines)
+        return self.wrap_cache[2]
+
+
+class MessageArchive:
+    """Messages spilled out of a MessageLog, kept on disk and read back lazily.
+
+    Records are stored as JSON lines in the data file at `path`. A second file
+    holds the end offset of every record, so any message can be found with a
+    single seek and no per-message state is kept in memory.
+    """
+
+    def __init__(self, path: str, length: int = 0):
+        """Open the archive at `path`, keeping only its first `length` messages."""
+        self.path = path
+        self.data = open(path, "a+b")
+        self.index = open(f"{path}.idx", "a+b")
+        self.index.seek(0, os.SEEK_END)
+        self.length = min(length, self.index.tell() // OFFSET.size)
+        self.end = self.end_offset(self.length - 1) if self.length else 0
+
+        # Drop anything archived after `length`, such as by a newer, unsaved run.
+        self.index.truncate(self.length * OFFSET.size)
+        self.data.truncate(self.end)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def end_offset(self, index: int) -> int:
+        """Return the offset in the data file where the given record ends."""
+        self.index.seek(index * OFFSET.size)
+        (offset,) = OFFSET.unpack(self.index.read(OFFSET.size))
+        return offset
+
+    def append(self, message: Message) -> None:
+        """Add a message to the end of the archive."""
+        record = json.dumps([message.plain_text, message.fg, message.count]).encode()
+        self.end += len(record) + 1
+        # Both files are opened for appending, so writes always land at the end.
+        self.data.write(record + b"\n")
+        self.index.write(OFFSET.pack(self.end))
+        # Flushed, so a save referring to this message can always find it.
+        self.data.flush()
+        self.index.flush()
+        self.length += 1
+
+    def __getitem__(self, index: int) -> Message:
+        """Read one message back from disk."""
+        start = self.end_offset(index - 1) if index else 0
+        self.data.seek(start)
+        text, fg, count = json.loads(self.data.readline())
+        message = Message(text, tuple(fg))
+        message.count = count
+        return message
+
+    def close(self) -> None:
+        """Close the archive's files."""
+        self.data.close()
+        self.index.close()
+
+
+class MessageHistory:
+    """The first `stop` messages of a log, read lazily from newest to oldest."""
+
+    def __init__(self, log: "MessageLog", stop: int):
+        self.log = log
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop
+
+    def __reversed__(self) -> Iterator[Message]:
+        messages = self.log.messages
+        archive = self.log.archive
+        archived = len(archive) if archive is not None else 0
+
+        in_memory = self.stop - archived
+        if in_memory > 0:
+            yield from itertools.islice(
+                reversed(messages), len(messages) - in_memory, None
+            )
+        if archive is not None:
+            for index in range(min(self.stop, archived) - 1, -1, -1):
+                yield archive[index]
+
 
 class MessageLog:
-    """A class representing the message log."""
+    """A class representing the message log.
+
+    Only the most recent `capacity` messages are kept in memory. Older messages
+    are written to `archive` if one is attached, and dropped otherwise.
+    """
+
+    def __init__(
+        self, capacity: int = 1000, archive: Optional[MessageArchive] = None
+    ) -> None:
+        self.capacity = capacity
+        self.messages: Deque[Message] = deque()
+        self.archive = archive
 
-    def __init__(self) -> None:
-        self.messages: List[Message] = []
+    def __len__(self) -> int:
+        """The number of messages that can be read back, including archived ones."""
+        archived = len(self.archive) if self.archive is not None else 0
+        return archived + len(self.messages)
 
     def add_message(
         self,
@@ -44,7 +156,19 @@ class MessageLog:
         if stack and self.messages and text == self.messages[-1].plain_text:
             self.messages[-1].count += 1
         else:
-            self.messages.append(Message(text, fg))
+            self.append(Message(text, fg))
+
+    def append(self, message: Message) -> None:
+        """Append a message, spilling the oldest one if the log is full."""
+        if len(self.messages) >= self.capacity:
+            oldest = self.messages.popleft()
+            if self.archive is not None:
+                self.archive.append(oldest)
+        self.messages.append(message)
+
+    def history(self, stop: int) -> MessageHistory:
+        """Return the first `stop` messages that can be read back from this log."""
+        return MessageHistory(self, stop)
 
     def render(
         self,
@@ -87,7 +211,7 @@ class MessageLog:
         y_offset = height - 1
 
         for message in reversed(messages):
-            for line in reversed(list(cls.wrap(message.full_text, width))):
+            for line in reversed(message.wrapped(width)):
                 console.print(x=x, y=y + y_offset, string=line, fg=message.fg)
                 y_offset -= 1
                 if y_offset < 0:
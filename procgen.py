@@ -2,9 +2,9 @@
 from __future__ import annotations
 
 import math
-import random
-from typing import Dict, Iterator, List, Tuple, TYPE_CHECKING
+from typing import Any, Callable, Dict, Iterator, List, Tuple, TYPE_CHECKING
 
+import numpy as np  # type: ignore
 import tcod
 
 import entity_factories
@@ -12,6 +12,8 @@ import tile_types
 from game_map import GameMap
 
 if TYPE_CHECKING:
+    from random import Random
+
     from engine import Engine
     from entity import Entity
 
@@ -48,42 +50,59 @@ def generate_dungeon(
     map_width: int,
     map_height: int,
     engine: Engine,
+    floor_number: int,
+    rng: Random,
 ) -> GameMap:
-    """Generate a new dungeon map."""
-    player = engine.player
-    dungeon = GameMap(engine, map_width, map_height, entities=[player])
+    """Generate a new dungeon map, drawing every random choice from `rng`.
+
+    Only the new map is modified, so this is safe to run on another thread while
+    the game carries on. The player is not placed; they arrive at the map's
+    `start_location`.
+    """
+    dungeon = GameMap(engine, map_width, map_height)
 
     rooms: List[RectangularRoom] = []
+    # Tiles covered by a placed room, walls included. Rooms overlap exactly when
+    # one covers a tile the other does, so checking a candidate takes one slice
+    # of this instead of a comparison with every placed room.
+    occupied = np.zeros((map_width, map_height), dtype=bool, order="F")
+    # Tiles to dig out. Assigning to the structured tiles array is slow, so it is
+    # done once for all of these at the end.
+    dug = np.zeros((map_width, map_height), dtype=bool, order="F")
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         new_room = RectangularRoom(x, y, room_width, room_height)
 
-        # Run through the other rooms and see if they intersect with this one.
-        if any(new_room.intersects(other_room) for other_room in rooms):
+        # See if this room intersects with any of the other rooms.
+        if occupied[new_room.outer].any():
             continue  # This room intersects, so go to the next attempt.
+        occupied[new_room.outer] = True
 
-        # Dig out this room's inner area.
-        dungeon.tiles[new_room.inner] = tile_types.floor
+        # Mark this room's inner area to be dug out.
+        dug[new_room.inner] = True
 
         if len(rooms) == 0:
             # The first room, where the player starts.
-            player.place(*new_room.center, gamemap=dungeon)
+            dungeon.start_location = new_room.center
         else:  # All rooms after the first.
-            # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            # Mark a tunnel between this room and the previous one.
+            for index in tunnel_slices(rooms[-1].center, new_room.center, rng):
+                dug[index] = True
 
-        place_entities(new_room, dungeon, engine.game_world.current_floor)
+        place_entities(new_room, dungeon, floor_number, rng)
 
         # Finally, append the new room to the list.
         rooms.append(new_room)
 
+    dungeon.tiles[dug] = tile_types.floor
+    if floor_number > 1:
+        dungeon.tiles[dungeon.start_location] = tile_types.up_stairs
     dungeon.tiles[rooms[-1].center] = tile_types.down_stairs
     dungeon.downstairs_location = rooms[-1].center
 
@@ -94,28 +113,47 @@ def place_entities(
     room: RectangularRoom,
     dungeon: GameMap,
     floor_number: int,
+    rng: Random,
 ) -> None:
     """Function that places entities in a game map room."""
-    number_of_monsters = random.randint(
+
+    def random_location() -> Tuple[int, int]:
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
+        return x, y
+
+    spawn_entities(dungeon, floor_number, rng, random_location)
+
+
+def spawn_entities(
+    dungeon: GameMap,
+    floor_number: int,
+    rng: Random,
+    random_location: Callable[[], Tuple[int, int]],
+) -> None:
+    """Spawn one area's worth of monsters and items at random free locations.
+
+    random_location : picks a walkable location in the area, drawing from `rng`
+    """
+    number_of_monsters = rng.randint(
         0, get_max_value_for_floor(max_monsters_by_floor, floor_number)
     )
     monsters: List[Entity] = get_entities_at_random(
-        enemy_chances, number_of_monsters, floor_number
+        enemy_chances, number_of_monsters, floor_number, rng
     )
-    number_of_items = random.randint(
+    number_of_items = rng.randint(
         0, get_max_value_for_floor(max_items_by_floor, floor_number)
     )
     items: List[Entity] = get_entities_at_random(
-        item_chances, number_of_items, floor_number
+        item_chances, number_of_items, floor_number, rng
     )
     for entity in monsters + items:
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
+        x, y = random_location()
 
-        if not any(
-            x == other_entity.x and y == other_entity.y
-            for other_entity in dungeon.entities
-        ):
+        # The player will arrive on the start tile, so keep it free as well.
+        if (x, y) == dungeon.start_location:
+            continue
+        if not dungeon.get_entities_at_location(x, y):
             entity.spawn(dungeon, x, y)
 
 
@@ -138,6 +176,7 @@ def get_entities_at_random(
     weighted_chances_by_floor: Dict[int, List[Tuple[Entity, int]]],
     number_of_entities: int,
     floor: int,
+    rng: Random,
 ) -> List[Entity]:
     entity_weighted_chances = {}
 
@@ -154,7 +193,7 @@ def get_entities_at_random(
     entities = list(entity_weighted_chances.keys())
     entity_weighted_chance_values = list(entity_weighted_chances.values())
 
-    chosen_entities = random.choices(
+    chosen_entities = rng.choices(
         entities, weights=entity_weighted_chance_values, k=number_of_entities
     )
 
@@ -162,17 +201,18 @@ def get_entities_at_random(
 
 
 def tunnel_between(
-    start: Tuple[int, int], end: Tuple[int, int]
+    start: Tuple[int, int], end: Tuple[int, int], rng: Random
 ) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points.
 
     start : starting (x,y) point to connect
     end : ending (x,y) point to connect
+    rng : random number generator choosing which way the tunnel bends
     """
     x1, y1 = start
     x2, y2 = end
 
-    if random.random() < 0.5:
+    if rng.random() < 0.5:
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -186,6 +226,30 @@ def tunnel_between(
         yield x, y
 
 
+def tunnel_slices(
+    start: Tuple[int, int], end: Tuple[int, int], rng: Random
+) -> Tuple[Tuple[Any, Any], Tuple[Any, Any]]:
+    """Return the two legs of the L-shaped tunnel between these points as indices.
+
+    Covers the same tiles as `tunnel_between` given the same `rng` state, as a
+    2D array index per straight leg, so a whole leg is dug in one assignment.
+    """
+    x1, y1 = start
+    x2, y2 = end
+
+    if rng.random() < 0.5:
+        # Move horizontally, then vertically.
+        return (
+            (slice(min(x1, x2), max(x1, x2) + 1), y1),
+            (x2, slice(min(y1, y2), max(y1, y2) + 1)),
+        )
+    # Move vertically, then horizontally.
+    return (
+        (x1, slice(min(y1, y2), max(y1, y2) + 1)),
+        (slice(min(x1, x2), max(x1, x2) + 1), y2),
+    )
+
+
 class RectangularRoom:
     """A class that defines rectangular room procedural generation."""
 
@@ -208,6 +272,11 @@ class RectangularRoom:
         """Return the inner area of this room as a 2D array index."""
         return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
 
+    @property
+    def outer(self) -> Tuple[slice, slice]:
+        """Return the whole area of this room, walls included, as a 2D array index."""
+        return slice(self.x1, self.x2 + 1), slice(self.y1, self.y2 + 1)
+
     def intersects(self, other: RectangularRoom) -> bool:
         """Return True if this room overlaps with another RectangularRoom."""
         return (
@@ -0,0 +1,184 @@
+"""Lightweight timing of the phases of each turn and frame.
+
+The whole game shares the module's `profiler`. While it is disabled, starting a
+phase only checks a flag and returns a do-nothing context manager.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Any, ContextManager, Deque, Dict, Optional
+
+import numpy as np  # type: ignore
+import tcod
+
+import color
+
+NO_PHASE: ContextManager[None] = nullcontext()
+
+# Characters drawing histogram bars, from empty to full.
+BAR_LEVELS = " .:-=+*#"
+
+
+class Profiler:
+    """Keeps the recent durations of named phases, and a trace of when they ran.
+
+    Every phase keeps its last `history` durations, for the summaries and
+    histograms of the overlay. Up to `trace_events` phases are also kept as
+    Chrome trace events, to be written out with `export_trace` and opened in
+    chrome://tracing or Perfetto.
+    """
+
+    def __init__(
+        self, enabled: bool = False, history: int = 240, trace_events: int = 100_000
+    ):
+        self.enabled = enabled
+        self.history = history
+        self.origin = time.perf_counter()
+        self.samples: Dict[str, Deque[float]] = {}
+        self.trace: Deque[Dict[str, Any]] = deque(maxlen=trace_events)
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        history: Optional[int] = None,
+        trace_events: Optional[int] = None,
+    ) -> None:
+        """Change the settings given, keeping what was recorded where possible."""
+        if enabled is not None:
+            self.enabled = enabled
+        if history is not None and history != self.history:
+            self.history = history
+            self.samples = {
+                name: deque(samples, maxlen=history)
+                for name, samples in self.samples.items()
+            }
+        if trace_events is not None and trace_events != self.trace.maxlen:
+            self.trace = deque(self.trace, maxlen=trace_events)
+
+    def toggle(self) -> bool:
+        """Turn profiling on or off, returning whether it is now on."""
+        self.enabled = not self.enabled
+        return self.enabled
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """Return a context manager timing a phase, if profiling is enabled."""
+        if not self.enabled:
+            return NO_PHASE
+        return PhaseTimer(self, name)
+
+    def record(
+        self, name: str, start: float, seconds: float, sample: bool = True
+    ) -> None:
+        """Record a phase that started at `start` (from time.perf_counter).
+
+        With `sample` False, it only goes into the trace and not the history, for
+        many small phases that are summed up by another.
+        """
+        if sample:
+            self.add_sample(name, seconds)
+        self.trace.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": seconds * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            }
+        )
+
+    def add_sample(self, name: str, seconds: float) -> None:
+        """Add a duration to the history of a phase, without tracing it."""
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.history)
+        self.samples[name].append(seconds)
+
+    def summary(self, name: str) -> Dict[str, float]:
+        """Return the mean, median, 95th percentile and maximum of a phase, in ms."""
+        samples = np.fromiter(self.samples.get(name, ()), dtype=np.float64) * 1000
+        if not len(samples):
+            return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        p50, p95 = np.percentile(samples, [50, 95])
+        return {
+            "mean": float(samples.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "max": float(samples.max()),
+        }
+
+    def histogram(self, name: str, bins: int = 8) -> np.ndarray:
+        """Return how many recent durations of a phase fall in each of `bins`.
+
+        The bins split the range from zero to the longest duration evenly.
+        """
+        samples = np.fromiter(self.samples.get(name, ()), dtype=np.float64)
+        if not len(samples):
+            return np.zeros(bins, dtype=np.int64)
+        counts, _ = np.histogram(samples, bins=bins, range=(0, samples.max() or 1))
+        return counts
+
+    def export_trace(self, filename: str) -> int:
+        """Write the trace as Chrome trace JSON, returning the number of events."""
+        events = list(self.trace)
+        with open(filename, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def render(self, console: tcod.Console, x: int, y: int, width: int) -> None:
+        """Draw a line per phase with its timings and a histogram of them."""
+        names = sorted(self.samples)
+        console.draw_frame(
+            x,
+            y,
+            width,
+            len(names) + 3,
+            title="Profiler (ms)",
+            clear=True,
+            fg=color.white,
+            bg=color.black,
+        )
+        console.print(
+            x + 1, y + 1, f"{'phase':<14} mean  p95   max", fg=color.profiler_header
+        )
+        for i, name in enumerate(names, start=2):
+            stats = self.summary(name)
+            counts = self.histogram(name)
+            top = counts.max() or 1
+            bars = "".join(
+                BAR_LEVELS[(len(BAR_LEVELS) - 1) * int(count) // int(top)]
+                for count in counts
+            )
+            console.print(
+                x + 1,
+                y + i,
+                f"{name[:14]:<14}{stats['mean']:5.1f}{stats['p95']:6.1f}"
+                f"{stats['max']:6.1f} {bars}"[: width - 2],
+                fg=color.white,
+            )
+
+
+class PhaseTimer:
+    """Times a `with` block and records it on a profiler."""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: Profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        end = time.perf_counter()
+        self.profiler.record(self.name, self.start, end - self.start)
+
+
+profiler = Profiler()
+"""The profiler shared by the whole game."""
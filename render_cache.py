@@ -0,0 +1,149 @@
+"""Keeps the last rendered frame and redraws only the parts that changed."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+from tcod.console import Console
+
+import color
+import tile_types
+
+if TYPE_CHECKING:
+    from game_map import GameMap
+
+Region = Tuple[int, int, int, int]  # x, y, width, height
+Glyph = Tuple[str, Tuple[int, int, int]]  # char, color
+
+
+class RenderCache:
+    """An offscreen copy of the last frame, redrawn only where its inputs changed.
+
+    The map layer is recomposed only at tiles whose `visible` or `explored` state
+    changed, or entirely when the map or its tiles array is replaced. Code editing
+    tiles in place must call `invalidate` afterwards. Entities are patched
+    only at tiles where the top-most visible entity changed. Widgets are redrawn
+    only when the key describing their inputs changes.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.layer = Console(width, height, order="F")
+        self.game_map: Optional[GameMap] = None
+        self.tiles: Optional[np.ndarray] = None
+        self.visible: Optional[np.ndarray] = None
+        self.explored: Optional[np.ndarray] = None
+        # The map graphics without entities, used to erase entities that moved.
+        self.map_graphics: Optional[np.ndarray] = None
+        self.glyphs: Dict[Tuple[int, int], Glyph] = {}
+        self.widgets: Dict[str, Tuple[Any, Region]] = {}
+
+    def render_map(self, game_map: GameMap) -> None:
+        """Bring the map and the entities on it up to date on the layer."""
+        tiles_rgb = self.layer.tiles_rgb
+        view = tiles_rgb[0 : game_map.width, 0 : game_map.height]
+        redraw_all = game_map is not self.game_map or game_map.tiles is not self.tiles
+
+        if redraw_all:
+            self.map_graphics = np.select(
+                condlist=[game_map.visible, game_map.explored],
+                choicelist=[game_map.tiles["light"], game_map.tiles["dark"]],
+                default=tile_types.SHROUD,
+            )
+            view[...] = self.map_graphics
+            changed_tiles = set()
+        elif np.array_equal(game_map.visible, self.visible) and np.array_equal(
+            game_map.explored, self.explored
+        ):
+            changed_tiles = set()
+        else:
+            changed = (game_map.visible != self.visible) | (
+                game_map.explored != self.explored
+            )
+            index = np.nonzero(changed)
+            self.map_graphics[index] = np.select(
+                condlist=[game_map.visible[index], game_map.explored[index]],
+                choicelist=[
+                    game_map.tiles["light"][index],
+                    game_map.tiles["dark"][index],
+                ],
+                default=tile_types.SHROUD,
+            )
+            view[index] = self.map_graphics[index]
+            changed_tiles = set(zip(*(axis.tolist() for axis in index)))
+
+        self.game_map = game_map
+        self.tiles = game_map.tiles
+        self.visible = game_map.visible.copy()
+        self.explored = game_map.explored.copy()
+
+        glyphs = self.visible_glyphs(game_map)
+        if redraw_all:
+            dirty = glyphs.keys()
+        else:
+            dirty = {
+                xy
+                for xy in self.glyphs.keys() | glyphs.keys()
+                if xy in changed_tiles or self.glyphs.get(xy) != glyphs.get(xy)
+            }
+        for xy in dirty:
+            tiles_rgb[xy] = self.map_graphics[xy]
+            glyph = glyphs.get(xy)
+            if glyph is not None:
+                tiles_rgb["ch"][xy] = ord(glyph[0])
+                tiles_rgb["fg"][xy] = glyph[1]
+        self.glyphs = glyphs
+
+    def invalidate(self) -> None:
+        """Force the whole map to be recomposed on the next frame."""
+        self.game_map = None
+
+    @staticmethod
+    def visible_glyphs(game_map: GameMap) -> Dict[Tuple[int, int], Glyph]:
+        """Return the glyph of the top-most entity on each visible tile."""
+        table = game_map.entity_table
+        columns = table.columns
+        rows = np.flatnonzero(table.on_tiles(game_map.visible))
+        # Sort so the entity drawn on top of each tile comes first. Later entities
+        # draw over earlier ones of the same render order.
+        rows = rows[
+            np.lexsort((columns["sequence"][rows], columns["render_order"][rows]))
+        ][::-1]
+        tile_keys = (
+            columns["x"][rows].astype(np.int64) * game_map.height + columns["y"][rows]
+        )
+        _, first = np.unique(tile_keys, return_index=True)
+
+        glyphs = {}
+        for row in rows[first].tolist():
+            entity = table.entities[row]
+            glyphs[entity.x, entity.y] = (entity.char, entity.color)
+        return glyphs
+
+    def render_widget(
+        self,
+        name: str,
+        key: Any,
+        region: Region,
+        draw: Callable[[Console], None],
+    ) -> None:
+        """Redraw a widget if its `key` or `region` changed since the last frame."""
+        previous = self.widgets.get(name)
+        if previous is not None:
+            if previous == (key, region):
+                return
+            self.clear_region(previous[1])
+        self.clear_region(region)
+        draw(self.layer)
+        self.widgets[name] = (key, region)
+
+    def clear_region(self, region: Region) -> None:
+        """Blank a region of the layer."""
+        x, y, width, height = region
+        if width > 0 and height > 0:
+            self.layer.draw_rect(
+                x, y, width, height, ch=ord(" "), fg=color.white, bg=color.black
+            )
+
+    def blit(self, console: Console) -> None:
+        """Copy the cached frame onto a console."""
+        self.layer.blit(console)
@@ -17,9 +17,7 @@ def get_names_at_location(x: int, y: int, game_map: GameMap) -> List[str]:
         return []
 
     return [
-        entity.name.capitalize()
-        for entity in game_map.entities
-        if entity.x == x and entity.y == y
+        entity.name.capitalize() for entity in game_map.get_entities_at_location(x, y)
     ]
 
 
@@ -0,0 +1,275 @@
+"""Record the player's actions in a journal, and replay journals without a window.
+
+A journal is a header holding the game's seed, followed by one fixed size
+record per player action or level up choice. As every random choice in a game
+is drawn from its seed, replaying the records on a new game from the same seed
+(and the same config.yml) plays the game out exactly as it went.
+"""
+from __future__ import annotations
+
+import enum
+import os
+import struct
+import time
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, TYPE_CHECKING
+
+import actions
+import color
+import exceptions
+import setup_game
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+MAGIC = b"RLJRNL"
+JOURNAL_VERSION = 1
+HEADER = struct.Struct("<6sHQ")
+RECORD = struct.Struct("<Bbbhhh")  # kind, dx, dy, item index, target x, target y
+
+NO_ITEM = -1
+
+
+class Kind(enum.IntEnum):
+    """What a journal record holds."""
+
+    LEVEL_UP = 0  # The item index is the choice: max HP, power or defense.
+    WAIT = 1
+    BUMP = 2
+    MELEE = 3
+    MOVE = 4
+    PICKUP = 5
+    STAIRS = 6
+    USE_ITEM = 7
+    DROP_ITEM = 8
+    EQUIP = 9
+
+
+ACTION_KINDS: Dict[type, Kind] = {
+    actions.WaitAction: Kind.WAIT,
+    actions.BumpAction: Kind.BUMP,
+    actions.MeleeAction: Kind.MELEE,
+    actions.MovementAction: Kind.MOVE,
+    actions.PickupAction: Kind.PICKUP,
+    actions.TakeStairsAction: Kind.STAIRS,
+    actions.ItemAction: Kind.USE_ITEM,
+    actions.DropItem: Kind.DROP_ITEM,
+    actions.EquipAction: Kind.EQUIP,
+}
+"""The kind of record for each action a player can take. Others are not recorded."""
+
+
+class JournalError(Exception):
+    """Raised when a file is not a journal this version can read."""
+
+
+class Record(NamedTuple):
+    """One player action or level up choice."""
+
+    kind: Kind
+    dx: int = 0
+    dy: int = 0
+    item: int = NO_ITEM
+    target_x: int = 0
+    target_y: int = 0
+
+
+def encode(action: actions.Action) -> Optional[Record]:
+    """Return the record for a player action, or None if it is not recorded."""
+    kind = ACTION_KINDS.get(type(action))
+    if kind is None:
+        return None
+    if isinstance(action, actions.ActionWithDirection):
+        return Record(kind, action.dx, action.dy)
+    if isinstance(action, (actions.ItemAction, actions.EquipAction)):
+        items = action.entity.inventory.items
+        item = items.index(action.item) if action.item in items else NO_ITEM
+        if isinstance(action, actions.ItemAction):
+            return Record(
+                kind,
+                item=item,
+                target_x=action.target_xy[0],
+                target_y=action.target_xy[1],
+            )
+        return Record(kind, item=item)
+    return Record(kind)
+
+
+def decode(record: Record, engine: Engine) -> actions.Action:
+    """Return the action a record describes, taken by the engine's player."""
+    player = engine.player
+    kind = record.kind
+    if kind == Kind.WAIT:
+        return actions.WaitAction(player)
+    if kind == Kind.BUMP:
+        return actions.BumpAction(player, record.dx, record.dy)
+    if kind == Kind.MELEE:
+        return actions.MeleeAction(player, record.dx, record.dy)
+    if kind == Kind.MOVE:
+        return actions.MovementAction(player, record.dx, record.dy)
+    if kind == Kind.PICKUP:
+        return actions.PickupAction(player)
+    if kind == Kind.STAIRS:
+        return actions.TakeStairsAction(player)
+
+    items = player.inventory.items
+    if not 0 <= record.item < len(items):
+        raise JournalError(
+            f"No item {record.item} in the inventory to replay {kind.name}"
+        )
+    item = items[record.item]
+    if kind == Kind.USE_ITEM:
+        return actions.ItemAction(player, item, (record.target_x, record.target_y))
+    if kind == Kind.DROP_ITEM:
+        return actions.DropItem(player, item)
+    if kind == Kind.EQUIP:
+        return actions.EquipAction(player, item)
+    raise JournalError(f"Record of kind {kind.name} is not an action")
+
+
+def apply_level_up(engine: Engine, choice: int) -> None:
+    """Raise the stat the player chose when levelling up."""
+    level = engine.player.level
+    if choice == 0:
+        level.increase_max_hp()
+    elif choice == 1:
+        level.increase_power()
+    else:
+        level.increase_defense()
+
+
+class ActionJournal:
+    """Appends the records of a game to a journal file as it is played.
+
+    Records are flushed as they are written, so a journal survives a crash up
+    to the action that caused it.
+    """
+
+    def __init__(self, filename: str, seed: int):
+        if not 0 <= seed < 2**64:
+            raise ValueError(f"Only seeds from 0 to 2**64 can be journaled, not {seed}")
+        self.filename = filename
+        self.file: BinaryIO = open(filename, "wb")
+        self.file.write(HEADER.pack(MAGIC, JOURNAL_VERSION, seed))
+        self.records = 0
+
+    def write(self, record: Record) -> None:
+        """Append a record to the journal."""
+        self.file.write(RECORD.pack(*record))
+        self.file.flush()
+        self.records += 1
+
+    def record_action(self, action: actions.Action) -> None:
+        """Append a player action, if it is one that gets recorded."""
+        record = encode(action)
+        if record is not None:
+            self.write(record)
+
+    def record_level_up(self, choice: int) -> None:
+        """Append the stat chosen on levelling up: 0 max HP, 1 power, 2 defense."""
+        self.write(Record(Kind.LEVEL_UP, item=choice))
+
+    def close(self) -> None:
+        """Close the journal file. Closing it again does nothing."""
+        self.file.close()
+
+    def __enter__(self) -> ActionJournal:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class Journal(NamedTuple):
+    """The seed and records read from a journal file."""
+
+    seed: int
+    records: List[Record]
+
+
+def read_journal(filename: str) -> Journal:
+    """Read a whole journal file."""
+    with open(filename, "rb") as f:
+        header = f.read(HEADER.size)
+        data = f.read()
+    if len(header) < HEADER.size:
+        raise JournalError(f"{filename} is too short to be a journal")
+    magic, version, seed = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise JournalError(f"{filename} is not a journal")
+    if version != JOURNAL_VERSION:
+        raise JournalError(
+            f"{filename} is journal version {version}, not {JOURNAL_VERSION}"
+        )
+    # A record cut short by a crash is dropped.
+    end = len(data) - len(data) % RECORD.size
+    records = [
+        Record(Kind(fields[0]), *fields[1:])
+        for fields in RECORD.iter_unpack(data[:end])
+    ]
+    return Journal(seed, records)
+
+
+class Replayer:
+    """Plays a journal on a new game from its seed, as fast as it can.
+
+    Mirrors `EventHandler.handle_action` without rendering. Every
+    `checkpoint_every` turns the game is saved to `checkpoint_dir`, so a long
+    game can be picked up from close to any turn.
+    """
+
+    def __init__(
+        self,
+        journal: Journal,
+        checkpoint_every: int = 0,
+        checkpoint_dir: Optional[str] = None,
+    ):
+        self.journal = journal
+        self.engine = setup_game.new_game(seed=journal.seed)
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoints: List[str] = []
+        self.failed_actions = 0
+        self.seconds = 0.0
+
+    def steps(self) -> Iterator[int]:
+        """Replay the records one at a time, yielding the turn after each."""
+        engine = self.engine
+        for record in self.journal.records:
+            if not engine.player.is_alive:
+                break
+            if record.kind == Kind.LEVEL_UP:
+                apply_level_up(engine, record.item)
+                yield engine.turn_count
+                continue
+
+            action = decode(record, engine)
+            try:
+                action.perform()
+            except exceptions.ActionCannotBePerformed as exc:
+                engine.message_log.add_message(
+                    exc.args[0], color.action_cannot_be_performed
+                )
+                self.failed_actions += 1
+                yield engine.turn_count
+                continue
+            engine.handle_npc_turns()
+            engine.update_fov()
+            if self.checkpoint_every and engine.turn_count % self.checkpoint_every == 0:
+                self.checkpoint()
+            yield engine.turn_count
+
+    def checkpoint(self) -> None:
+        """Save the game as it is at the current turn."""
+        directory = self.checkpoint_dir or "."
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, f"turn-{self.engine.turn_count:06d}.sav")
+        self.engine.save_as(filename)
+        self.checkpoints.append(filename)
+
+    def run(self) -> Engine:
+        """Replay the whole journal and return the resulting game."""
+        start = time.perf_counter()
+        for _ in self.steps():
+            pass
+        self.seconds += time.perf_counter() - start
+        return self.engine
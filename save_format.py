@@ -0,0 +1,517 @@
+"""Compact, versioned save files.
+
+A save file is a small uncompressed header followed by a gzip stream of
+length-prefixed chunks. The first chunk is a pickled manifest built only from
+plain values: the entity table, compact component records, the message log and
+the world settings. Every other chunk is a raw NumPy buffer (tile arrays, the
+visible/explored bitmaps and the entity table columns) referenced out-of-band
+by the manifest, so large arrays are never copied through pickle.
+"""
+from __future__ import annotations
+
+import enum
+import gzip
+import importlib
+import lzma
+import os
+import pickle
+import struct
+from typing import Any, BinaryIO, Callable, Dict, List, NamedTuple, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+from components.ai import BaseAI
+from components.base_component import BaseComponent
+from components.inventory import Inventory
+from entity import Actor, Entity
+from game_map import GameMap
+from game_world import GameWorld
+from message_log import Message, MessageArchive
+from render_order import RenderOrder
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+MAGIC = b"RLSAVE"
+SAVE_VERSION = 8
+HEADER = struct.Struct("<6sH")
+CHUNK_LENGTH = struct.Struct("<Q")
+LEGACY_MAGIC = b"\xfd7zXZ\x00"  # Old saves are an lzma compressed Engine pickle.
+
+# Values of the entity table's parent column that do not refer to another entity.
+ON_MAP = -1
+DETACHED = -2
+
+# Entity attributes stored as entity table columns rather than as records.
+ENTITY_COLUMNS = ("x", "y", "char", "color", "blocks_movement", "render_order")
+
+MIGRATIONS: Dict[int, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    1: lambda manifest: {**manifest, "turn_count": 0},
+    2: lambda manifest: {**manifest, "message_archive": None},
+    3: lambda manifest: {
+        **manifest,
+        "map": {**manifest["map"], "start_location": (0, 0)},
+        "floors": {"run_id": None, "hot": {}, "cold": {}},
+    },
+    4: lambda manifest: {
+        **manifest,
+        "world": {**manifest["world"], "generator": ("rooms", {})},
+    },
+    5: lambda manifest: {
+        **manifest,
+        "world": {**manifest["world"], "stairs_percentile": None},
+    },
+    6: lambda manifest: add_actor_state(manifest, speed=100, energy=0),
+    7: lambda manifest: add_actor_state(manifest, awake_until=0),
+}
+"""Upgrade functions for manifests, keyed by the version they upgrade from."""
+
+
+class SaveFormatError(Exception):
+    """Raised when a file is not a save file this version can read."""
+
+
+class EntityRef(NamedTuple):
+    """A reference to a row of the entity table."""
+
+    index: int
+
+
+class Record(NamedTuple):
+    """The class and attributes of a component, or of an entity's extra state."""
+
+    cls: str
+    state: Dict[str, Any]
+
+
+def class_path(cls: type) -> str:
+    """Return the importable path of a class."""
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def resolve_class(path: str) -> Any:
+    """Import and return the class at a path made by `class_path`."""
+    module_name, qualname = path.split(":")
+    obj: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def add_actor_state(manifest: Dict[str, Any], **defaults: Any) -> Dict[str, Any]:
+    """Give the actors in a manifest, and in its other floors, any missing state."""
+
+    def upgrade(map_manifest: Dict[str, Any]) -> Dict[str, Any]:
+        records = [
+            Record(record.cls, {**defaults, **record.state})
+            if issubclass(resolve_class(record.cls), Actor)
+            else record
+            for record in map_manifest["entities"]["records"]
+        ]
+        return {
+            **map_manifest,
+            "entities": {**map_manifest["entities"], "records": records},
+        }
+
+    floors = manifest["floors"]
+    hot = {
+        floor: upgrade(hot_manifest) for floor, hot_manifest in floors["hot"].items()
+    }
+    return {**upgrade(manifest), "floors": {**floors, "hot": hot}}
+
+
+class Encoder:
+    """Flatten an Engine into a manifest of plain values and NumPy arrays."""
+
+    def __init__(self) -> None:
+        self.entities: List[Entity] = []
+        self.indices: Dict[int, int] = {}
+
+    def ref(self, entity: Entity) -> EntityRef:
+        """Return the table row of an entity, adding it to the table if needed."""
+        index = self.indices.get(id(entity))
+        if index is None:
+            index = self.indices[id(entity)] = len(self.entities)
+            self.entities.append(entity)
+        return EntityRef(index)
+
+    def value(self, value: Any) -> Any:
+        """Encode an attribute value."""
+        if value is None or isinstance(value, (bool, int, float, str, enum.Enum)):
+            return value
+        if isinstance(value, Entity):
+            return self.ref(value)
+        if isinstance(value, tuple):
+            return tuple(self.value(item) for item in value)
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.value(item) for key, item in value.items()}
+        if isinstance(value, (BaseComponent, BaseAI)):
+            return Record(
+                class_path(type(value)),
+                {key: self.value(item) for key, item in value.attributes()},
+            )
+        raise TypeError(f"Can not save values of type {type(value).__name__}.")
+
+    def encode(self, engine: Engine) -> Dict[str, Any]:
+        """Return the manifest for an Engine."""
+        game_world = engine.game_world
+
+        self.ref(engine.player)
+        manifest = self.encode_map(engine.game_map)
+
+        rng = getattr(game_world, "rng", None)
+        archive = getattr(engine.message_log, "archive", None)
+        floors = getattr(game_world, "floors", None)
+        if floors is not None:
+            # Evicted floors are referred to by their cache files, so they must exist.
+            floors.flush()
+        manifest.update(
+            {
+                "player": self.ref(engine.player).index,
+                "turn_count": getattr(engine, "turn_count", 0),
+                "mouse_location": tuple(engine.mouse_location),
+                "messages": [
+                    (message.plain_text, tuple(message.fg), message.count)
+                    for message in engine.message_log.messages
+                ],
+                # Only the archive's length is saved; its messages are already on disk.
+                "message_archive": (archive.path, len(archive))
+                if archive is not None
+                else None,
+                "world": {
+                    "map_width": game_world.map_width,
+                    "map_height": game_world.map_height,
+                    "max_rooms": game_world.max_rooms,
+                    "room_min_size": game_world.room_min_size,
+                    "room_max_size": game_world.room_max_size,
+                    "current_floor": game_world.current_floor,
+                    "seed": getattr(game_world, "seed", None),
+                    "generator": (
+                        getattr(game_world, "generator_name", "rooms"),
+                        getattr(game_world, "generator_options", {}),
+                    ),
+                    "stairs_percentile": getattr(game_world, "stairs_percentile", None),
+                    "rng_state": rng.getstate() if rng is not None else None,
+                },
+                # Other floors kept in memory are saved in full, colder ones only
+                # by the name of their cache file.
+                "floors": {
+                    "run_id": floors.run_id,
+                    "hot": {
+                        floor: snapshot_map(game_map)
+                        for floor, game_map in floors.hot.items()
+                        if game_map is not engine.game_map
+                    },
+                    "cold": dict(floors.cold),
+                }
+                if floors is not None
+                else {"run_id": None, "hot": {}, "cold": {}},
+            }
+        )
+        return manifest
+
+    def encode_map(self, game_map: GameMap) -> Dict[str, Any]:
+        """Return the manifest for a map and the entities on it."""
+        for entity in game_map.entities:
+            self.ref(entity)
+
+        # The table grows while it is walked, as records reference more entities.
+        records = []
+        parents = []
+        for entity in self.entities:
+            state = {
+                key: self.value(value)
+                for key, value in entity.attributes()
+                if key not in ENTITY_COLUMNS and key != "parent"
+            }
+            records.append(Record(class_path(type(entity)), state))
+
+            parent = getattr(entity, "parent", None)
+            if parent is game_map:
+                parents.append(ON_MAP)
+            elif isinstance(parent, Inventory):
+                parents.append(self.ref(parent.parent).index)
+            else:
+                parents.append(DETACHED)
+
+        entities = self.entities
+        return {
+            "map": {
+                "width": game_map.width,
+                "height": game_map.height,
+                # Copied, so the manifest stays valid while the game carries on.
+                "tiles": game_map.tiles.copy(order="F"),
+                "visible": game_map.visible.copy(order="F"),
+                "explored": game_map.explored.copy(order="F"),
+                "downstairs_location": tuple(game_map.downstairs_location),
+                "start_location": tuple(getattr(game_map, "start_location", (0, 0))),
+            },
+            "entities": {
+                "x": np.array([e.x for e in entities], dtype=np.int32),
+                "y": np.array([e.y for e in entities], dtype=np.int32),
+                "char": np.array([ord(e.char) for e in entities], dtype=np.int32),
+                "color": np.array([e.color for e in entities], dtype=np.uint8).reshape(
+                    -1, 3
+                ),
+                "blocks_movement": np.array(
+                    [e.blocks_movement for e in entities], dtype=bool
+                ),
+                "render_order": np.array(
+                    [e.render_order.value for e in entities], dtype=np.uint8
+                ),
+                "parent": np.array(parents, dtype=np.int32),
+                "records": records,
+            },
+        }
+
+
+class Decoder:
+    """Rebuild an Engine from a manifest."""
+
+    def __init__(self, manifest: Dict[str, Any]):
+        self.manifest = manifest
+        self.entities: List[Entity] = []
+
+    def value(self, value: Any) -> Any:
+        """Decode an attribute value."""
+        if isinstance(value, EntityRef):
+            return self.entities[value.index]
+        if isinstance(value, Record):
+            cls = resolve_class(value.cls)
+            obj = cls.__new__(cls)
+            for key, item in value.state.items():
+                setattr(obj, key, self.value(item))
+            return obj
+        if isinstance(value, tuple):
+            return tuple(self.value(item) for item in value)
+        if isinstance(value, list):
+            return [self.value(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.value(item) for key, item in value.items()}
+        return value
+
+    def decode(self) -> Engine:
+        """Return the Engine described by the manifest."""
+        from engine import Engine
+
+        self.decode_entities()
+
+        engine = Engine(player=self.entities[self.manifest["player"]])
+        engine.turn_count = self.manifest["turn_count"]
+        engine.mouse_location = self.manifest["mouse_location"]
+        if self.manifest["message_archive"] is not None:
+            path, length = self.manifest["message_archive"]
+            engine.message_log.archive = MessageArchive(path, length)
+        for text, fg, count in self.manifest["messages"]:
+            message = Message(text, fg)
+            message.count = count
+            engine.message_log.append(message)
+
+        world = self.manifest["world"]
+        floors = self.manifest["floors"]
+        engine.game_world = GameWorld(
+            engine=engine,
+            map_width=world["map_width"],
+            map_height=world["map_height"],
+            max_rooms=world["max_rooms"],
+            room_min_size=world["room_min_size"],
+            room_max_size=world["room_max_size"],
+            current_floor=world["current_floor"],
+            seed=world["seed"],
+            pregenerate=engine.config.procgen["pregenerate"],
+            hot_floors=engine.config.floors["hot"],
+            floor_cache_dir=str(engine.config.paths["floor_cache"]),
+            run_id=floors["run_id"],
+            generator=world["generator"][0],
+            generator_options=world["generator"][1],
+            stairs_percentile=world["stairs_percentile"],
+        )
+        if world["rng_state"] is not None:
+            engine.game_world.rng.setstate(world["rng_state"])
+
+        engine.game_map = self.decode_map(engine)
+
+        store = engine.game_world.floors
+        store.cold.update(floors["cold"])
+        for floor, manifest in floors["hot"].items():
+            store.put(floor, decode_map(manifest, engine))
+        store.put(engine.game_world.current_floor, engine.game_map)
+
+        engine.game_world.prepare_next_floor()
+        return engine
+
+    def decode_entities(self) -> None:
+        """Create every entity in the manifest's entity table."""
+        table = self.manifest["entities"]
+        records: List[Record] = table["records"]
+
+        # Create every entity first, so records can refer to any of them.
+        for i, record in enumerate(records):
+            cls = resolve_class(record.cls)
+            entity = cls.__new__(cls)
+            entity.x = int(table["x"][i])
+            entity.y = int(table["y"][i])
+            entity.char = chr(table["char"][i])
+            entity.color = tuple(int(c) for c in table["color"][i])
+            entity.blocks_movement = bool(table["blocks_movement"][i])
+            entity.render_order = RenderOrder(int(table["render_order"][i]))
+            self.entities.append(entity)
+        for entity, record in zip(self.entities, records):
+            for key, value in record.state.items():
+                setattr(entity, key, self.value(value))
+
+    def decode_map(self, engine: Engine) -> GameMap:
+        """Return the map in the manifest, with the decoded entities placed on it."""
+        map_data = self.manifest["map"]
+        game_map = GameMap(engine, map_data["width"], map_data["height"])
+        game_map.tiles = map_data["tiles"]
+        game_map.visible = map_data["visible"]
+        game_map.explored = map_data["explored"]
+        game_map.downstairs_location = map_data["downstairs_location"]
+        game_map.start_location = map_data["start_location"]
+
+        for entity, parent in zip(self.entities, self.manifest["entities"]["parent"]):
+            if parent == ON_MAP:
+                entity.parent = game_map
+                game_map.add_entity(entity)
+            elif parent != DETACHED:
+                entity.parent = self.entities[parent].inventory
+        return game_map
+
+
+def snapshot(engine: Engine) -> Dict[str, Any]:
+    """Return a manifest of the Engine's current state.
+
+    The manifest shares no mutable state with the Engine, so it can be written
+    out by another thread while the game continues.
+    """
+    return Encoder().encode(engine)
+
+
+def snapshot_map(game_map: GameMap) -> Dict[str, Any]:
+    """Return a manifest of a map and the entities on it, like `snapshot`."""
+    return Encoder().encode_map(game_map)
+
+
+def decode_map(manifest: Dict[str, Any], engine: Engine) -> GameMap:
+    """Rebuild a map made by `snapshot_map`, belonging to an Engine."""
+    decoder = Decoder(manifest)
+    decoder.decode_entities()
+    return decoder.decode_map(engine)
+
+
+def write_snapshot(
+    manifest: Dict[str, Any], filename: str, compression_level: int = 6
+) -> int:
+    """Write a manifest to a save file and return the number of bytes written.
+
+    The file is written next to its destination and then renamed over it, so an
+    interrupted save never leaves a truncated file behind.
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    data = pickle.dumps(manifest, protocol=5, buffer_callback=buffers.append)
+    temporary_filename = f"{filename}.tmp"
+    with open(temporary_filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SAVE_VERSION))
+        with gzip.GzipFile(
+            fileobj=f, mode="wb", compresslevel=compression_level, mtime=0
+        ) as stream:
+            write_chunk(stream, data)
+            for buffer in buffers:
+                write_chunk(stream, buffer.raw())
+        bytes_written = f.tell()
+    os.replace(temporary_filename, filename)
+    return bytes_written
+
+
+def save_engine(engine: Engine, filename: str, compression_level: int = 6) -> int:
+    """Save an Engine to a file and return the number of bytes written."""
+    return write_snapshot(snapshot(engine), filename, compression_level)
+
+
+def save_map(game_map: GameMap, filename: str, compression_level: int = 6) -> int:
+    """Save a map and its entities to a file and return the number of bytes written."""
+    return write_snapshot(snapshot_map(game_map), filename, compression_level)
+
+
+def load_engine(filename: str) -> Engine:
+    """Load an Engine from a save file, migrating older formats if needed."""
+    with open(filename, "rb") as f:
+        if f.read(len(LEGACY_MAGIC)) == LEGACY_MAGIC:
+            f.seek(0)
+            return migrate_legacy(f)
+
+    manifest, version = read_snapshot(filename)
+    while version < SAVE_VERSION:
+        manifest = MIGRATIONS[version](manifest)
+        version += 1
+    return Decoder(manifest).decode()
+
+
+def load_map(filename: str, engine: Engine) -> GameMap:
+    """Load a map written by `write_snapshot(snapshot_map(...))`."""
+    manifest, version = read_snapshot(filename)
+    if version != SAVE_VERSION:
+        raise SaveFormatError(f"{filename} was saved by another version of the game.")
+    return decode_map(manifest, engine)
+
+
+def read_snapshot(filename: str) -> Tuple[Dict[str, Any], int]:
+    """Read the manifest from a file made by `write_snapshot`, and its version."""
+    with open(filename, "rb") as f:
+        magic, version = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise SaveFormatError(f"{filename} is not a save file.")
+        if version > SAVE_VERSION:
+            raise SaveFormatError(
+                f"{filename} was saved by a newer version of the game."
+            )
+
+        with gzip.GzipFile(fileobj=f, mode="rb") as stream:
+            manifest_data = read_chunk(stream)
+            buffers = []
+            while True:
+                buffer = read_chunk(stream)
+                if buffer is None:
+                    break
+                buffers.append(buffer)
+    assert manifest_data is not None
+
+    return pickle.loads(manifest_data, buffers=buffers), version
+
+
+def migrate_legacy(f: BinaryIO) -> Engine:
+    """Load an old pickled Engine and rebuild it through the current format."""
+    from engine import Engine
+
+    engine = pickle.loads(lzma.decompress(f.read()))
+    assert isinstance(engine, Engine)
+    manifest = add_actor_state(
+        Encoder().encode(engine), speed=100, energy=0, awake_until=0
+    )
+    return Decoder(manifest).decode()
+
+
+def write_chunk(stream: BinaryIO, data: Any) -> None:
+    """Write a length prefixed chunk of bytes."""
+    data = memoryview(data).cast("B")
+    stream.write(CHUNK_LENGTH.pack(len(data)))
+    stream.write(data)
+
+
+def read_chunk(stream: BinaryIO) -> Any:
+    """Read a length prefixed chunk of bytes, or return None at the end."""
+    prefix = stream.read(CHUNK_LENGTH.size)
+    if not prefix:
+        return None
+    (length,) = CHUNK_LENGTH.unpack(prefix)
+    data = bytearray(length)
+    view = memoryview(data)
+    while view:
+        read = stream.readinto(view)
+        if not read:
+            raise SaveFormatError("The save file is truncated.")
+        view = view[read:]
+    return data
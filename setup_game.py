@@ -1,29 +1,34 @@
 """Handle the loading and initialization of game sessions."""
 from __future__ import annotations
 
-import copy
-import lzma
-import pickle
 import traceback
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 import tcod
 
+import assets
 import color
-from engine import Engine
-import entity_factories
 import input_handlers
-from config import Config
-from game_world import GameWorld
+from config import get_config
 
-# Load the background image and remove the alpha channel.
-background_image = tcod.image.load("./bg-1.png")[:, :, :3]
+if TYPE_CHECKING:
+    from engine import Engine
 
+# The engine is only imported once a game is started or loaded, so that the
+# main menu comes up without waiting on it.
 
-def new_game() -> Engine:
-    """Return a brand new game session as an Engine instance."""
-    config = Config()
-    player = copy.deepcopy(entity_factories.player)
+
+def new_game(seed: Optional[int] = None) -> Engine:
+    """Return a brand new game session as an Engine instance.
+
+    Games started with the same `seed` play out identically.
+    """
+    from engine import Engine
+    import entity_factories
+    from game_world import GameWorld
+
+    config = get_config()
+    player = entity_factories.player.clone()
 
     engine = Engine(player=player)
     engine.game_world = GameWorld(
@@ -33,6 +38,13 @@ def new_game() -> Engine:
         room_max_size=config.procgen["rooms"]["max_size"],
         map_width=config.view["map"]["width"],
         map_height=config.view["map"]["height"],
+        seed=seed,
+        pregenerate=config.procgen["pregenerate"],
+        hot_floors=config.floors["hot"],
+        floor_cache_dir=str(config.paths["floor_cache"]),
+        generator=config.procgen["generator"],
+        generator_options=config.procgen["generators"].get(config.procgen["generator"]),
+        stairs_percentile=config.procgen["stairs_percentile"],
     )
     engine.game_world.generate_floor()
     engine.update_fov()
@@ -41,8 +53,8 @@ def new_game() -> Engine:
         config.view["messages"]["welcome_message"], color.welcome_text
     )
 
-    dagger = copy.deepcopy(entity_factories.dagger)
-    leather_armor = copy.deepcopy(entity_factories.leather_armor)
+    dagger = entity_factories.dagger.clone()
+    leather_armor = entity_factories.leather_armor.clone()
 
     dagger.parent = player.inventory
     leather_armor.parent = player.inventory
@@ -56,10 +68,39 @@ def new_game() -> Engine:
     return engine
 
 
+def start_archive(engine: Engine) -> Engine:
+    """Archive the older messages of a new game, if enabled.
+
+    The archive file is emptied, so this is only done for a game that replaces
+    the saved one, whose messages were archived in the same file.
+    """
+    from message_log import MessageArchive
+
+    config = get_config()
+    if config.message_log["archive"]:
+        engine.message_log.archive = MessageArchive(config.message_log["archive"])
+    return engine
+
+
+def start_journal(engine: Engine) -> Engine:
+    """Record the player's actions in a new game to the journal, if enabled."""
+    from replay import ActionJournal
+
+    engine.close_journal()
+    config = get_config()
+    if config.replay["record"]:
+        engine.journal = ActionJournal(
+            str(config.paths["journal"]), engine.game_world.seed
+        )
+    return engine
+
+
 def load_game(filename: str) -> Engine:
     """Load an Engine instance from a file."""
-    with open(filename, "rb") as f:
-        engine = pickle.loads(lzma.decompress(f.read()))
+    from engine import Engine
+    import save_format
+
+    engine = save_format.load_engine(filename)
     assert isinstance(engine, Engine)
     return engine
 
@@ -69,11 +110,11 @@ class MainMenu(input_handlers.BaseEventHandler):
 
     def __init__(self):
         super(MainMenu, self).__init__()
-        self.config = Config()
+        self.config = get_config()
 
     def on_render(self, console: tcod.Console) -> None:
         """Render the main menu on a background image."""
-        console.draw_semigraphics(background_image, 0, 0)
+        console.draw_semigraphics(assets.load_image("bg-1.png"), 0, 0)
 
         console.print(
             console.width // 2,
@@ -112,6 +153,11 @@ class MainMenu(input_handlers.BaseEventHandler):
                 return input_handlers.PopupMessage(self, f"Failed to load save:\n{exc}")
             pass
         elif event.sym == tcod.event.K_n:
-            return input_handlers.MainGameEventHandler(new_game())
+            engine = new_game()
+            # The new game replaces the saved one, along with its floors and messages.
+            engine.game_world.floors.prune()
+            return input_handlers.MainGameEventHandler(
+                start_journal(start_archive(engine))
+            )
 
         return None
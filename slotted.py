@@ -0,0 +1,64 @@
+"""Base class for compact objects that keep their attributes in __slots__."""
+from __future__ import annotations
+
+import functools
+from typing import Any, Iterator, Tuple, TypeVar
+
+S = TypeVar("S", bound="Slotted")
+
+MISSING = object()
+
+
+@functools.lru_cache(maxsize=None)
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """Return the names of every slot of a class, including inherited ones."""
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        names.extend(name for name in slots if name not in ("__dict__", "__weakref__"))
+    return tuple(names)
+
+
+class Slotted:
+    """An object whose attributes live in __slots__ instead of a __dict__.
+
+    Subclasses should declare `__slots__` naming the attributes they add, or
+    `__slots__ = ()` if they add none. A subclass that does not declare them
+    still works, but gets a __dict__ again.
+    """
+
+    __slots__ = ()
+
+    def attributes(self) -> Iterator[Tuple[str, Any]]:
+        """Yield the name and value of every attribute that is set."""
+        for name in slot_names(type(self)):
+            value = getattr(self, name, MISSING)
+            if value is not MISSING:
+                yield name, value
+        yield from getattr(self, "__dict__", {}).items()
+
+    def shallow_copy(self: S) -> S:
+        """Return a new object sharing all of this object's attribute values."""
+        cls = type(self)
+        clone = cls.__new__(cls)
+        for name in slot_names(cls):
+            value = getattr(self, name, MISSING)
+            if value is not MISSING:
+                setattr(clone, name, value)
+        if hasattr(self, "__dict__"):
+            clone.__dict__.update(self.__dict__)
+        return clone
+
+    def __setstate__(self, state: Any) -> None:
+        """Restore pickled state.
+
+        Besides the (dict, slots) pair pickled from slotted objects, this accepts
+        the plain dict pickled from these classes before they had slots.
+        """
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = {**(dict_state or {}), **(slots_state or {})}
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -0,0 +1,90 @@
+"""Areas of effect and target choice, shared by scrolls, spells and traps.
+
+Areas are boolean masks the size of the map, computed only within the square
+around their center that can hold them. The actors they catch are looked up
+in bulk from the entity table, so a blast resolves in the same few array
+operations however crowded the fight.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+from tcod.map import compute_fov
+
+if TYPE_CHECKING:
+    from entity import Actor
+    from game_map import GameMap
+
+
+def effect_window(
+    shape: Tuple[int, int], x: int, y: int, radius: float
+) -> Tuple[slice, slice]:
+    """Return the slices of a map holding every tile within `radius` of (x, y)."""
+    reach = int(radius)
+    return (
+        slice(max(0, x - reach), min(shape[0], x + reach + 1)),
+        slice(max(0, y - reach), min(shape[1], y + reach + 1)),
+    )
+
+
+def radius_mask(shape: Tuple[int, int], x: int, y: int, radius: float) -> np.ndarray:
+    """Return a mask of the tiles at most `radius` from (x, y), as Entity.distance."""
+    mask = np.zeros(shape, dtype=bool)
+    xs, ys = effect_window(shape, x, y, radius)
+    dx = np.arange(xs.start, xs.stop) - x
+    dy = np.arange(ys.start, ys.stop) - y
+    mask[xs, ys] = dx[:, np.newaxis] ** 2 + dy[np.newaxis, :] ** 2 <= radius**2
+    return mask
+
+
+def blast_mask(transparent: np.ndarray, x: int, y: int, radius: float) -> np.ndarray:
+    """Return a mask of the tiles a blast at (x, y) reaches.
+
+    Those are the tiles within `radius` that can be seen from the center, so
+    walls and other opaque tiles shelter whatever is behind them. A blast at an
+    opaque tile reaches only that tile, rather than both sides of the wall.
+    """
+    if not transparent[x, y]:
+        mask = np.zeros(transparent.shape, dtype=bool)
+        mask[x, y] = True
+        return mask
+    mask = radius_mask(transparent.shape, x, y, radius)
+    xs, ys = effect_window(transparent.shape, x, y, radius)
+    mask[xs, ys] &= compute_fov(
+        transparent[xs, ys], (x - xs.start, y - ys.start), light_walls=False
+    )
+    mask[x, y] = True
+    return mask
+
+
+def actors_in_area(game_map: GameMap, area: np.ndarray) -> List[Actor]:
+    """Return the living actors standing on True tiles of `area`, in query order."""
+    table = game_map.entity_table
+    return table.select(table.living_actors() & table.on_tiles(area))
+
+
+def actors_in_blast(game_map: GameMap, x: int, y: int, radius: float) -> List[Actor]:
+    """Return the living actors a blast at (x, y) would reach."""
+    return actors_in_area(
+        game_map, blast_mask(game_map.tiles["transparent"], x, y, radius)
+    )
+
+
+def nearest_visible_actor(
+    game_map: GameMap,
+    x: int,
+    y: int,
+    closer_than: float,
+    exclude: Optional[Actor] = None,
+) -> Optional[Actor]:
+    """Return the visible living actor nearest to (x, y), if one is close enough.
+
+    `exclude` is an actor to leave out, such as the one looking. Ties go to the
+    actor that comes first in query order.
+    """
+    table = game_map.entity_table
+    mask = table.living_actors() & table.on_tiles(game_map.visible)
+    if exclude is not None and exclude in table.rows:
+        mask[table.rows[exclude]] = False
+    return table.nearest(x, y, mask, closer_than)  # type: ignore
@@ -0,0 +1,145 @@
+"""Decides which actors act during the world's part of a turn, and in what order."""
+from __future__ import annotations
+
+import heapq
+import time
+from typing import Dict, List, Optional, Set, Tuple, Type, TYPE_CHECKING
+
+import numpy as np  # type: ignore
+
+import exceptions
+from profiling import profiler
+
+if TYPE_CHECKING:
+    from components.ai import BaseAI
+    from engine import Engine
+    from entity import Actor
+    from game_map import GameMap
+
+# Energy spent by every action. An actor with a speed of ACTION_COST acts once a
+# turn, one with twice that acts twice and one with half of it every other turn.
+ACTION_COST = 100
+
+
+class TurnScheduler:
+    """Runs the turns of every actor but the player, by energy.
+
+    Each turn, every actor gains its speed in energy. Actors then act one action
+    at a time, the one with the most energy first, until none has ACTION_COST
+    left. Ties go to the actor that arrived on the map first, so turns always
+    play out in the same order.
+
+    The actors of the current map are kept in a list that is only rebuilt when
+    actors are added, removed, or die. Actors farther from the player than the
+    `ai.activity_radius` setting are dormant and skipped entirely, without
+    gaining energy, unless noise has woken them for a while (see
+    `GameMap.make_noise`).
+    Before anyone acts, each AI class is asked in one batch which of its active
+    actors would do nothing, and those are skipped too.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.game_map: Optional[GameMap] = None
+        self.version = -1
+        self.actors: List[Actor] = []
+        # The entity table row of each actor, valid until the table's version changes.
+        self.rows = np.zeros(0, dtype=np.intp)
+
+    def scheduled_actors(self) -> List[Actor]:
+        """Return the actors of the current map that take turns, in order."""
+        game_map = self.engine.game_map
+        table = game_map.entity_table
+        if game_map is not self.game_map or table.version != self.version:
+            self.game_map = game_map
+            self.version = table.version
+            self.actors = [
+                actor
+                for actor in table.select(table.living_actors())
+                if actor is not self.engine.player
+            ]
+            self.rows = np.array(
+                [table.rows[actor] for actor in self.actors], dtype=np.intp
+            )
+        return self.actors
+
+    def active_actors(self) -> List[Actor]:
+        """Return the scheduled actors that are not dormant, in order."""
+        actors = self.scheduled_actors()
+        radius = self.engine.config.ai["activity_radius"]
+        if radius <= 0 or not actors:
+            return actors
+
+        table = self.engine.game_map.entity_table
+        player = self.engine.player
+        active = table.within_radius(player.x, player.y, radius)[self.rows] | (
+            table.columns["awake_until"][self.rows] > self.engine.turn_count
+        )
+        return [actors[index] for index in np.flatnonzero(active).tolist()]
+
+    def idle_actors(self, actors: List[Actor]) -> Set[Actor]:
+        """Return the actors whose AI would do nothing this turn.
+
+        Each AI class decides for all of its actors at once.
+        """
+        by_class: Dict[Type[BaseAI], List[BaseAI]] = {}
+        for actor in actors:
+            if actor.ai is not None:
+                by_class.setdefault(type(actor.ai), []).append(actor.ai)
+
+        idle: Set[Actor] = set()
+        for ai_class, ais in by_class.items():
+            mask = ai_class.idle(ais)
+            idle.update(ai.entity for ai, is_idle in zip(ais, mask.tolist()) if is_idle)
+        return idle
+
+    def handle_turns(self) -> None:
+        """Let every actor spend its energy, which ends the world's part of a turn."""
+        game_map = self.engine.game_map
+        actors = self.active_actors()
+        for actor in actors:
+            actor.energy += actor.speed
+        idle = self.idle_actors(actors)
+
+        queue: List[Tuple[int, int, Actor]] = [
+            (-actor.energy, order, actor)
+            for order, actor in enumerate(actors)
+            if actor.energy >= ACTION_COST
+        ]
+        heapq.heapify(queue)
+        # Seconds spent by each AI class this turn, while profiling.
+        ai_seconds: Optional[Dict[str, float]] = {} if profiler.enabled else None
+        while queue:
+            _, order, actor = heapq.heappop(queue)
+            if not actor.is_alive or actor.parent is not game_map:
+                continue  # Killed or moved away by an earlier actor this turn.
+
+            actor.energy -= ACTION_COST
+            if actor not in idle:
+                if ai_seconds is None:
+                    self.perform(actor)
+                else:
+                    self.perform_timed(actor, ai_seconds)
+            if actor.energy >= ACTION_COST:
+                heapq.heappush(queue, (-actor.energy, order, actor))
+
+        if ai_seconds is not None:
+            for name, seconds in ai_seconds.items():
+                profiler.add_sample(name, seconds)
+
+    @staticmethod
+    def perform(actor: Actor) -> None:
+        """Have an actor's AI take an action."""
+        try:
+            actor.ai.perform()
+        except exceptions.ActionCannotBePerformed:
+            pass  # Ignore failed action exceptions from AI.
+
+    def perform_timed(self, actor: Actor, ai_seconds: Dict[str, float]) -> None:
+        """Have an actor's AI take an action, adding its duration to `ai_seconds`."""
+        name = f"ai:{type(actor.ai).__name__}"
+        start = time.perf_counter()
+        self.perform(actor)
+        seconds = time.perf_counter() - start
+        profiler.record(name, start, seconds, sample=False)
+        ai_seconds[name] = ai_seconds.get(name, 0.0) + seconds